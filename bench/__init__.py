@@ -0,0 +1,2 @@
+# bench/__init__.py
+"""Benchmarks offline: fixtures HTML locais servidas por um stand-in HTTP."""
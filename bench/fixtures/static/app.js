@@ -0,0 +1,45 @@
+// bench/fixtures/static/app.js — app shell mínimo no estilo do Instagram.
+// Simula o custo de boot do bundle e faz roteamento client-side de /p/<code>/.
+(function () {
+  const bootMs = Number("__BOOT_MS__") || 0;
+  const t0 = performance.now();
+  while (performance.now() - t0 < bootMs) { /* parse/compile/hydrate simulado */ }
+
+  const root = document.getElementById("root");
+  const POSTS = Array.from({ length: 30 }, (_, i) => "post" + (i + 1));
+
+  function grid() {
+    return '<div role="grid">' + POSTS.map(c =>
+      `<a href="/p/${c}/"><div style="width:120px;height:120px;background:#ddd"></div></a>`
+    ).join("") + "</div>";
+  }
+
+  function post(code) {
+    return `<article data-code="${code}">
+      <div style="width:468px;height:468px;background:#bbb"></div>
+      <section>
+        <span><div role="button"><svg aria-label="Curtir" width="24" height="24" viewBox="0 0 24 24"><path d="M12 21l-1-1C5 15 2 12 2 8a5 5 0 0 1 10-1 5 5 0 0 1 10 1c0 4-3 7-9 12z"></path></svg></div></span>
+      </section>
+      <form><textarea aria-label="Adicione um comentário…"></textarea><div role="button">Publicar</div></form>
+    </article>`;
+  }
+
+  function render() {
+    const m = location.pathname.match(/^\/p\/([^/]+)\/?$/);
+    root.innerHTML = "<main>" + (m ? post(m[1]) : "") + grid() + "</main>";
+  }
+
+  document.addEventListener("click", e => {
+    const a = e.target.closest && e.target.closest("a[href]");
+    if (!a || a.origin !== location.origin) return;
+    e.preventDefault();
+    history.pushState({}, "", a.pathname);
+    render();
+  });
+  document.addEventListener("click", e => {
+    const svg = e.target.closest && e.target.closest("svg[aria-label='Curtir']");
+    if (svg) svg.setAttribute("aria-label", "Descurtir");
+  });
+  window.addEventListener("popstate", render);
+  render();
+})();
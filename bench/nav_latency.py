@@ -0,0 +1,93 @@
+# bench/nav_latency.py
+"""
+Compara a latência de navegação entre posts nos modos 'full' (driver.get) e
+'spa' (roteamento in-app) contra as fixtures offline de bench/fixtures.
+
+Uso:
+    python -m bench.nav_latency --posts 20 --latency-ms 80 --boot-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from bench.server import serve_fixtures
+from utils.driver import init_driver, close_driver, navigate
+
+READY = "svg[aria-label='Curtir'], svg[aria-label='Descurtir']"
+
+
+def _wait_selector(driver, css: str, timeout: float = 10.0) -> bool:
+    end = time.time() + timeout
+    while time.time() < end:
+        try:
+            if driver.execute_script(
+                "return !!document.querySelector(arguments[0]);", css
+            ):
+                return True
+        except Exception:
+            pass
+        time.sleep(0.02)
+    return False
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[k]
+
+
+def _run_mode(driver, base: str, mode: str, posts: int) -> Dict:
+    driver.get(f"{base}/")
+    _wait_selector(driver, "a[href^='/p/']")
+    times: List[float] = []
+    used: Dict[str, int] = {}
+    for i in range(posts):
+        url = f"{base}/p/post{(i % 30) + 1}/"
+        t0 = time.perf_counter()
+        how = navigate(driver, url, mode=mode, ready_selector=READY)
+        _wait_selector(driver, READY)
+        times.append(time.perf_counter() - t0)
+        used[how] = used.get(how, 0) + 1
+    return {"mode": mode, "times": times, "used": used}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--posts", type=int, default=20)
+    ap.add_argument("--latency-ms", type=float, default=80.0)
+    ap.add_argument("--boot-ms", type=int, default=300)
+    ap.add_argument("--headful", action="store_true")
+    args = ap.parse_args()
+
+    server, base = serve_fixtures(latency_ms=args.latency_ms, boot_ms=args.boot_ms)
+    with tempfile.TemporaryDirectory(prefix="bench-profile-") as profile:
+        driver = init_driver(headless=not args.headful, profile_dir=profile)
+        try:
+            results = [_run_mode(driver, base, m, args.posts) for m in ("full", "spa")]
+        finally:
+            close_driver(driver)
+            server.shutdown()
+
+    print(f"{'modo':<6} {'n':>4} {'média':>9} {'p50':>9} {'p95':>9}  métodos")
+    for r in results:
+        t = r["times"]
+        print(
+            f"{r['mode']:<6} {len(t):>4} {statistics.mean(t) * 1000:>7.1f}ms "
+            f"{_pct(t, 0.5) * 1000:>7.1f}ms {_pct(t, 0.95) * 1000:>7.1f}ms  {r['used']}"
+        )
+    full, spa = (statistics.mean(r["times"]) for r in results)
+    if full > 0:
+        print(
+            f"economia média por navegação (spa vs full): {(1 - spa / full) * 100:.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# bench/server.py
+from __future__ import annotations
+
+import argparse
+import hashlib
+import mimetypes
+import re
+import threading
+import time
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+RECORDED_DIR = FIXTURES_DIR / "recorded"  # gravadas com RECORD_FIXTURES=true
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serve arquivos de `root`. Qualquer rota sem arquivo correspondente recebe o
+    app shell (shell.html), como o Instagram faz com /p/<code>/ e /explore/...
+    """
+
+    def __init__(
+        self,
+        *args,
+        root: Path,
+        latency_ms: float,
+        boot_ms: int,
+        recorded: Optional[Path] = None,
+        **kw,
+    ):
+        self.root = root
+        self.latency_ms = latency_ms
+        self.boot_ms = boot_ms
+        self.recorded = recorded
+        super().__init__(*args, **kw)
+
+    def log_message(self, fmt, *args) -> None:  # silencioso
+        pass
+
+    def _pick_recorded(self, kind: str, key: str) -> Optional[Path]:
+        """Fixture gravada do tipo `kind`: pelo nome, senão estável pelo hash."""
+        if self.recorded is None:
+            return None
+        files: List[Path] = sorted((self.recorded / kind).glob("*.html"))
+        if not files:
+            return None
+        for f in files:
+            if f.stem == key:
+                return f
+        h = int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16)
+        return files[h % len(files)]
+
+    def _resolve_recorded(self) -> Optional[Path]:
+        parts = urlsplit(self.path)
+        segs = [s for s in parts.path.split("/") if s]
+        if segs[:1] in (["p"], ["reel"]):
+            return self._pick_recorded("post", "/".join(segs[:2]))
+        if segs[:3] == ["explore", "search", "keyword"]:
+            q = (parse_qs(parts.query).get("q") or [""])[0].lower()
+            # mesmo nome de arquivo que utils.recorder usa para keywords
+            return self._pick_recorded(
+                "keyword", re.sub(r"[^a-z0-9_-]+", "-", q).strip("-")
+            )
+        return None
+
+    def _resolve(self) -> Path:
+        rec = self._resolve_recorded()
+        if rec is not None:
+            return rec
+        rel = self.path.split("?", 1)[0].lstrip("/")
+        p = (self.root / rel).resolve()
+        if rel and p.is_file() and self.root in p.parents:
+            return p
+        return self.root / "shell.html"
+
+    def do_GET(self) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        p = self._resolve()
+        try:
+            body = p.read_bytes()
+        except Exception:
+            self.send_error(404)
+            return
+        if p.suffix == ".js":
+            body = body.replace(b"__BOOT_MS__", str(int(self.boot_ms)).encode())
+        ctype = mimetypes.guess_type(p.name)[0] or "application/octet-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_fixtures(
+    root: Path = FIXTURES_DIR,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_ms: float = 0.0,
+    boot_ms: int = 150,
+    recorded: Optional[Path] = None,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Sobe o stand-in em background e retorna (server, base_url). Com
+    `recorded`, /p/<code>/ e /explore/search/keyword/?q= servem as fixtures
+    gravadas do DOM real; o resto continua no app shell.
+    """
+    handler = partial(
+        _FixtureHandler,
+        root=Path(root).resolve(),
+        latency_ms=float(latency_ms),
+        boot_ms=int(boot_ms),
+        recorded=Path(recorded).resolve() if recorded else None,
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    t = threading.Thread(target=server.serve_forever, daemon=True, name="fixtures")
+    t.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve fixtures offline do bench.")
+    ap.add_argument("--root", default=str(FIXTURES_DIR))
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--boot-ms", type=int, default=150)
+    ap.add_argument(
+        "--recorded",
+        nargs="?",
+        const=str(RECORDED_DIR),
+        default=None,
+        help="serve as fixtures gravadas (padrão: bench/fixtures/recorded)",
+    )
+    args = ap.parse_args()
+    srv, base = serve_fixtures(
+        Path(args.root),
+        port=args.port,
+        latency_ms=args.latency_ms,
+        boot_ms=args.boot_ms,
+        recorded=Path(args.recorded) if args.recorded else None,
+    )
+    print(f"servindo {args.root} em {base} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -1,6 +1,59 @@
+import argparse
+import os
+import sys
+
 from dotenv import load_dotenv
-from utils.orchestrator import run
+
+
+def _parse_args():
+    ap = argparse.ArgumentParser(description="InstaPY Automator")
+    sub = ap.add_subparsers(dest="cmd")
+
+    pm = sub.add_parser(
+        "profile-maint", help="poda caches reconstruíveis do perfil do Chrome"
+    )
+    pm.add_argument("--profile", default=None, help="padrão: $SESSIONS_DIR/default")
+    pm.add_argument("--dry-run", action="store_true", help="só relata o que sairia")
+    pm.add_argument(
+        "--measure-start",
+        action="store_true",
+        help="mede o tempo de início do browser antes e depois",
+    )
+    pm.add_argument("--force", action="store_true", help="ignora o SingletonLock")
+
+    rp = sub.add_parser("report", help="resumo offline das execuções a partir dos logs")
+    rp.add_argument(
+        "files", nargs="*", help="logs (.log/.gz); padrão: $LOG_FILE e segmentos"
+    )
+    rp.add_argument("--csv", default=None, help="exporta em CSV (formato longo)")
+    rp.add_argument("--json", default=None, help="exporta em JSON")
+    return ap.parse_args()
+
 
 if __name__ == "__main__":
     load_dotenv()
+    args = _parse_args()
+
+    if args.cmd == "profile-maint":
+        from utils.profile_maint import run_maintenance
+
+        profile = args.profile or os.path.join(
+            os.getenv("SESSIONS_DIR", "sessions"), "default"
+        )
+        sys.exit(
+            run_maintenance(
+                profile,
+                dry_run=args.dry_run,
+                measure_start=args.measure_start,
+                force=args.force,
+            )
+        )
+
+    if args.cmd == "report":
+        from utils.report import run_report
+
+        sys.exit(run_report(args.files, csv_path=args.csv, json_path=args.json))
+
+    from utils.orchestrator import run
+
     run()
@@ -11,9 +11,15 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.common.exceptions import WebDriverException
 
-from utils.logger import get_logger
-from utils.driver import wait_for_page_ready
-from utils.collector import mark_target_consumed
+from utils.logger import get_logger, interruptible_sleep, stop_requested
+from utils.driver import navigate
+from utils.cdp_backend import get_page
+from utils.jslib import call as jscall
+from utils.navperf import begin_capture
+from utils.recorder import record_page
+from utils.domsnap import click_ref, locate, take_snapshot
+from utils.collector import mark_target_consumed, mark_target_failed
+from utils.blockstate import BlockState
 
 logger = get_logger("action")
 
@@ -24,22 +30,28 @@ logger = get_logger("action")
 def _sleep(a: float, b: float) -> None:
     t = random.uniform(a, b)
     logger.info(f"⏱️ aguardando {t:.3f}s")
-    time.sleep(t)
+    interruptible_sleep(t)
+
+
+def _target_id(target: Dict) -> str:
+    return target.get("id", target.get("url", ""))
+
+
+def _fail(profile_dir: Optional[str], target: Dict, reason: str) -> bool:
+    """Registra a falha no cache negativo do perfil e devolve False."""
+    logger.info(f"📉 falha registrada ({reason}) para {target.get('url')}")
+    mark_target_failed(profile_dir, _target_id(target), reason)
+    return False
 
 
 def _human_type(
     el, text: str, min_delay: float = 0.03, max_delay: float = 0.12
 ) -> None:
     for ch in text:
+        if stop_requested():
+            raise InterruptedError("parada solicitada durante digitação")
         el.send_keys(ch)
-        time.sleep(random.uniform(min_delay, max_delay))
-
-
-def _env_int(key: str, default: int) -> int:
-    try:
-        return int(os.getenv(key, str(default)).strip())
-    except Exception:
-        return default
+        interruptible_sleep(random.uniform(min_delay, max_delay))
 
 
 def _env_float(key: str, default: float) -> float:
@@ -51,21 +63,14 @@ def _env_float(key: str, default: float) -> float:
 
 def _js_query(driver: WebDriver, css: str):
     try:
-        return driver.execute_script(
-            "return document.querySelector(arguments[0]);", css
-        )
+        return jscall(driver, "q", css)
     except Exception:
         return None
 
 
 def _js_query_all(driver: WebDriver, css: str) -> list:
     try:
-        return (
-            driver.execute_script(
-                "return Array.from(document.querySelectorAll(arguments[0]));", css
-            )
-            or []
-        )
+        return jscall(driver, "qa", css) or []
     except Exception:
         return []
 
@@ -87,51 +92,69 @@ def _xpath_one(driver: WebDriver, xpath: str):
 
 def _highlight(driver: WebDriver, el, color: str = "red") -> None:
     try:
-        driver.execute_script(
-            """
-            const el = arguments[0], c = arguments[1];
-            el.scrollIntoView({block:'center', inline:'center'});
-            el.style.outline = `3px solid ${c}`;
-            el.style.outlineOffset = '2px';
-            """,
-            el,
-            color,
-        )
+        jscall(driver, "hl", el, color)
     except Exception:
         pass
 
 
 def _describe_el(driver: WebDriver, el) -> str:
     try:
-        return driver.execute_script(
-            """
-            const el = arguments[0];
-            const r = el.getBoundingClientRect();
-            const a = el.getAttribute('aria-label');
-            const w = el.getAttribute('width');
-            const h = el.getAttribute('height');
-            return `${el.tagName.toLowerCase()} aria='${a}' w=${w||'-'} h=${h||'-'} bx=${r.left.toFixed(0)},${r.top.toFixed(0)},${r.width.toFixed(0)}x${r.height.toFixed(0)}`;
-            """,
-            el,
-        )
+        return jscall(driver, "describe", el)
     except Exception:
         return "<element>"
 
 
+def _nav_mode() -> str:
+    """'full' (driver.get, padrão) ou 'spa' (roteamento in-app com fallback)."""
+    mode = (os.getenv("NAV_MODE", "full") or "full").strip().lower()
+    return mode if mode in ("full", "spa") else "full"
+
+
+def _post_ready_selector() -> str:
+    """Elementos que indicam que a página do post já renderizou."""
+    return ", ".join(
+        [
+            LIKE_CSS_PT,
+            LIKE_CSS_EN,
+            UNLIKE_CSS_PT,
+            UNLIKE_CSS_EN,
+            TA_PT_ELLIPSIS,
+            TA_PT_THREEDOTS,
+            TA_EN_ELLIPSIS,
+            TA_EN_THREEDOTS,
+        ]
+    )
+
+
 def _navigate_to_target(driver: WebDriver, target: Dict) -> bool:
     url = target.get("url")
     if not url:
         return False
-    logger.info(f"🧭 navegando para: {url}")
+    mode = _nav_mode()
+    logger.info(f"🧭 navegando para: {url} (modo={mode})")
+    cap = begin_capture(driver, _target_id(target), "post")
+    start = time.perf_counter()
     try:
-        driver.get(url)
+        used = navigate(
+            driver,
+            url,
+            mode=mode,
+            ready_selector=_post_ready_selector(),
+            spa_timeout=_env_float("NAV_SPA_TIMEOUT", 6.0),
+            cdp_timeout=_env_float("NAV_CDP_TIMEOUT", 30.0),
+        )
     except WebDriverException:
         try:
-            driver.get(url)
+            used = navigate(driver, url, mode="full")
         except Exception as e:
             logger.warning(f"Falha ao navegar para {url}: {e}")
+            if cap is not None:
+                cap.finish(driver, url=url, method="failed")
             return False
-    wait_for_page_ready(driver, timeout=12.0)
+    logger.info(f"🧭 navegação ({used}) em {time.perf_counter() - start:.3f}s")
+    if cap is not None:
+        cap.finish(driver, url=url, method=used)
+    record_page(driver, "post", _target_id(target))
     _sleep(0.4, 0.9)
     return True
 
@@ -161,10 +184,14 @@ ANY_24 = "//*[local-name()='svg' and @width='24' and @height='24']"  # debug
 # =========================
 # Comentário – PT/EN e … / ...
 # =========================
-TA_PT_ELLIPSIS = 'textarea[aria-label="Adicione um comentário…"]'
-TA_PT_THREEDOTS = 'textarea[aria-label="Adicione um comentário..."]'
-TA_EN_ELLIPSIS = 'textarea[aria-label="Add a comment…"]'
-TA_EN_THREEDOTS = 'textarea[aria-label="Add a comment..."]'
+TA_LABEL_PT_ELLIPSIS = "Adicione um comentário…"
+TA_LABEL_PT_THREEDOTS = "Adicione um comentário..."
+TA_LABEL_EN_ELLIPSIS = "Add a comment…"
+TA_LABEL_EN_THREEDOTS = "Add a comment..."
+TA_PT_ELLIPSIS = f'textarea[aria-label="{TA_LABEL_PT_ELLIPSIS}"]'
+TA_PT_THREEDOTS = f'textarea[aria-label="{TA_LABEL_PT_THREEDOTS}"]'
+TA_EN_ELLIPSIS = f'textarea[aria-label="{TA_LABEL_EN_ELLIPSIS}"]'
+TA_EN_THREEDOTS = f'textarea[aria-label="{TA_LABEL_EN_THREEDOTS}"]'
 
 # Botão de publicar (UI nova usa uma <div role="button"> com o texto)
 POST_BTN_XP_EN = "//div[@role='button' and normalize-space()='Post']"
@@ -239,31 +266,29 @@ def _click_svg_like(driver: WebDriver, el) -> bool:
         _sleep(0.10, 0.25)
         _highlight(driver, el, "red")
         logger.info(f"🖱️ click SVG alvo: {_describe_el(driver, el)}")
-        driver.execute_script("arguments[0].click();", el)
+        jscall(driver, "click", el)
         _sleep(0.10, 0.25)
         return True
     except Exception as e:
         logger.warning(f"Falha ao clicar no SVG (direto): {e}")
     try:
-        parent = driver.execute_script("return arguments[0].parentElement;", el)
+        parent = jscall(driver, "up", el, 1)
         if parent:
             _sleep(0.08, 0.18)
             _highlight(driver, parent, "red")
             logger.info(f"🖱️ fallback click PAI: {_describe_el(driver, parent)}")
-            driver.execute_script("arguments[0].click();", parent)
+            jscall(driver, "click", parent)
             _sleep(0.10, 0.25)
             return True
     except Exception as e:
         logger.warning(f"Falha ao clicar no pai: {e}")
     try:
-        grand = driver.execute_script(
-            "return arguments[0].parentElement?.parentElement;", el
-        )
+        grand = jscall(driver, "up", el, 2)
         if grand:
             _sleep(0.08, 0.18)
             _highlight(driver, grand, "red")
             logger.info(f"🖱️ fallback click AVÔ: {_describe_el(driver, grand)}")
-            driver.execute_script("arguments[0].click();", grand)
+            jscall(driver, "click", grand)
             _sleep(0.10, 0.25)
             return True
     except Exception as e:
@@ -290,6 +315,23 @@ _BLOCK_PATTERNS_EN = [
 ]
 
 
+_BLOCK_PATTERNS = _BLOCK_PATTERNS_PT + _BLOCK_PATTERNS_EN
+
+
+def _analysis_mode() -> str:
+    """ACTION_ANALYSIS=snapshot decide o estado do post num snapshot do DOM."""
+    v = (os.getenv("ACTION_ANALYSIS", "live") or "live").strip().lower()
+    return "snapshot" if v == "snapshot" else "live"
+
+
+def _snapshot_blocked(snap) -> bool:
+    txt = snap.blocked_text(_BLOCK_PATTERNS)
+    if txt:
+        logger.info(f"🚫 bloqueio detectado (snapshot): {txt!r}")
+        return True
+    return False
+
+
 def _detect_action_blocked(driver: WebDriver) -> bool:
     """Detecta sinais de bloqueio/limite na UI (PT/EN)."""
     try:
@@ -322,16 +364,17 @@ def _detect_action_blocked(driver: WebDriver) -> bool:
     return False
 
 
-def _cooldown_on_block() -> None:
-    # Padrão conservador: 10 a 30 minutos
-    cmin = _env_int("ACTION_BLOCK_COOLDOWN_MIN", 600)
-    cmax = _env_int("ACTION_BLOCK_COOLDOWN_MAX", 1800)
-    if cmax < cmin:
-        cmax = cmin
-    logger.info(
-        f"🧊 cooldown por bloqueio acionado: aguardando {cmin}-{cmax}s antes de retomar."
-    )
-    _sleep(cmin, cmax)
+def _cooldown_on_block(
+    driver: WebDriver, profile_dir: Optional[str], where: str
+) -> bool:
+    """
+    Registra o bloqueio no estado persistido do perfil e devolve False. O
+    cooldown (escalonado) é cumprido pelo orquestrador antes da próxima ação,
+    sem navegar.
+    """
+    record_page(driver, "block", f"{where}:{time.time():.0f}")
+    BlockState(profile_dir).record(where)
+    return False
 
 
 # =========================
@@ -379,6 +422,66 @@ def _find_post_button(driver: WebDriver):
     return None
 
 
+def _liked_now(driver: WebDriver) -> bool:
+    page = get_page(driver)
+    if page is not None:
+        try:
+            return bool(page.lib("anyOf", [UNLIKE_CSS_PT, UNLIKE_CSS_EN]))
+        except Exception:
+            pass
+    try:
+        return bool(jscall(driver, "anyOf", [UNLIKE_CSS_PT, UNLIKE_CSS_EN]))
+    except Exception:
+        return False
+
+
+def _do_like_snapshot(
+    driver: WebDriver, target: Dict, profile_dir: Optional[str]
+) -> Optional[bool]:
+    """
+    Like decidido a partir de um snapshot do DOM (uma ida ao browser);
+    só o clique volta ao browser, pela ref do snapshot. None = sem snapshot,
+    o chamador segue pelo caminho live.
+    """
+    snap = take_snapshot(driver)
+    if snap is None:
+        return None
+    if _snapshot_blocked(snap):
+        return _cooldown_on_block(driver, profile_dir, "like:antes")
+    if snap.unlike_refs:
+        logger.info("Post já curtido — marcando como consumido e pulando.")
+        mark_target_consumed(profile_dir, _target_id(target))
+        return True
+    if not snap.like_refs:
+        logger.info("❌ nenhum candidato de like encontrado (snapshot).")
+        return _fail(profile_dir, target, "no_like_button")
+
+    for ref in snap.like_refs[:2]:
+        _sleep(0.10, 0.25)
+        logger.info(f"🖱️ click like ref={ref}")
+        if not click_ref(driver, ref):
+            continue
+        end = time.time() + 3.5
+        while time.time() < end:
+            if _liked_now(driver):
+                logger.info("👍 estado mudou para 'Descurtir' — like confirmado.")
+                mark_target_consumed(profile_dir, _target_id(target))
+                return True
+            if not interruptible_sleep(0.15):
+                return False
+        after = take_snapshot(driver)
+        if after is not None:
+            if _snapshot_blocked(after):
+                return _cooldown_on_block(driver, profile_dir, "like:confirmação")
+            if after.unlike_refs:
+                mark_target_consumed(profile_dir, _target_id(target))
+                return True
+        logger.info("⚠️ clique executado, mas não confirmou 'Descurtir'.")
+
+    logger.info("❌ esgotou candidatos de like sem confirmação.")
+    return _fail(profile_dir, target, "unconfirmed")
+
+
 # =========================
 # Ações públicas
 # =========================
@@ -386,22 +489,28 @@ def do_like(
     driver: WebDriver, target: Dict, *, profile_dir: Optional[str] = None
 ) -> bool:
     if not _navigate_to_target(driver, target):
+        return _fail(profile_dir, target, "nav")
+    if stop_requested():
         return False
 
+    if _analysis_mode() == "snapshot":
+        res = _do_like_snapshot(driver, target, profile_dir)
+        if res is not None:
+            return res
+
     # checa bloqueio antes de tentar
     if _detect_action_blocked(driver):
-        _cooldown_on_block()
-        return False
+        return _cooldown_on_block(driver, profile_dir, "like:antes")
 
     if _already_liked(driver):
         logger.info("Post já curtido — marcando como consumido e pulando.")
-        mark_target_consumed(profile_dir, target.get("id", target.get("url", "")))
+        mark_target_consumed(profile_dir, _target_id(target))
         return True
 
     candidates = _gather_like_candidates(driver)
     if not candidates:
         logger.info("❌ nenhum candidato de like encontrado (SVG 24x24).")
-        return False
+        return _fail(profile_dir, target, "no_like_button")
 
     # tenta até 2 candidatos diferentes antes de desistir (evita spam de cliques)
     attempts = 0
@@ -412,8 +521,7 @@ def do_like(
         logger.info(f"resultado do clique: {'SUCESSO' if ok else 'FALHA'}")
         if not ok:
             if _detect_action_blocked(driver):
-                _cooldown_on_block()
-                return False
+                return _cooldown_on_block(driver, profile_dir, "like:clique")
             if attempts >= 2:
                 break
             continue
@@ -423,24 +531,22 @@ def do_like(
         while time.time() < end:
             if _already_liked(driver):
                 logger.info("👍 estado mudou para 'Descurtir' — like confirmado.")
-                mark_target_consumed(
-                    profile_dir, target.get("id", target.get("url", ""))
-                )
+                mark_target_consumed(profile_dir, _target_id(target))
                 return True
-            time.sleep(0.15)
+            if not interruptible_sleep(0.15):
+                return False
 
         logger.info(
             "⚠️ clique executado, mas não confirmou 'Descurtir' — verificando bloqueio e/ou tentando próximo…"
         )
         if _detect_action_blocked(driver):
-            _cooldown_on_block()
-            return False
+            return _cooldown_on_block(driver, profile_dir, "like:confirmação")
 
         if attempts >= 2:
             break
 
     logger.info("❌ esgotou candidatos de like sem confirmação.")
-    return False
+    return _fail(profile_dir, target, "unconfirmed")
 
 
 def do_comment(
@@ -458,17 +564,33 @@ def do_comment(
         return False
 
     if not _navigate_to_target(driver, target):
+        return _fail(profile_dir, target, "nav")
+    if stop_requested():
         return False
 
-    # checa bloqueio antes
-    if _detect_action_blocked(driver):
-        _cooldown_on_block()
-        return False
-
-    textarea = _find_comment_textarea_simple(driver)
+    snap = take_snapshot(driver) if _analysis_mode() == "snapshot" else None
+    if snap is not None:
+        if _snapshot_blocked(snap):
+            return _cooldown_on_block(driver, profile_dir, "comment:antes")
+        ref = snap.textarea_ref(
+            [
+                TA_LABEL_PT_THREEDOTS,
+                TA_LABEL_PT_ELLIPSIS,
+                TA_LABEL_EN_THREEDOTS,
+                TA_LABEL_EN_ELLIPSIS,
+            ]
+        )
+        textarea = locate(driver, ref) if ref else None
+    else:
+        # checa bloqueio antes
+        if _detect_action_blocked(driver):
+            return _cooldown_on_block(driver, profile_dir, "comment:antes")
+        textarea = _find_comment_textarea_simple(driver)
+    if textarea:
+        record_page(driver, "comment", _target_id(target))
     if not textarea:
         logger.info("❌ textarea de comentário não encontrada.")
-        return False
+        return _fail(profile_dir, target, "no_textarea")
 
     try:
         _highlight(driver, textarea, "red")
@@ -476,14 +598,12 @@ def do_comment(
         _sleep(0.12, 0.30)
         textarea.click()  # alguns layouts expandem no segundo clique
         _sleep(0.08, 0.16)
-        driver.execute_script("arguments[0].focus();", textarea)
+        jscall(driver, "focus", textarea)
     except Exception as e:
         logger.info(f"⚠️ foco inicial falhou: {e}")
 
     try:
-        is_active = driver.execute_script(
-            "return document.activeElement === arguments[0];", textarea
-        )
+        is_active = jscall(driver, "isActive", textarea)
         logger.info(f"   document.activeElement == textarea? {bool(is_active)}")
         if not is_active:
             textarea.click()
@@ -494,7 +614,13 @@ def do_comment(
     txt = text.strip()
     logger.info(f"⌨️ digitando comentário ({len(txt)} chars)")
     try:
-        _human_type(textarea, txt, min_delay=0.03, max_delay=0.12)
+        page = get_page(driver)
+        if page is not None:
+            # Input.insertText no elemento focado (o foco foi conferido acima)
+            if not page.type_text(txt, min_delay=0.03, max_delay=0.12):
+                raise InterruptedError("parada solicitada durante digitação")
+        else:
+            _human_type(textarea, txt, min_delay=0.03, max_delay=0.12)
     except Exception as e:
         logger.warning(f"Falha no send_keys direto: {e}")
         try:
@@ -502,18 +628,26 @@ def do_comment(
             _human_type(active, txt, min_delay=0.03, max_delay=0.12)
         except Exception as e2:
             logger.warning(f"Falha no activeElement: {e2}")
-            return False
+            if stop_requested():
+                return False
+            return _fail(profile_dir, target, "type_failed")
 
     _sleep(0.20, 0.45)
 
     # Preferir botão "Post"/"Publicar" (UI nova); senão ENTER
-    post_btn = _find_post_button(driver)
+    if snap is not None:
+        # o botão só aparece/habilita depois da digitação: novo snapshot
+        snap_btn = take_snapshot(driver)
+        ref = snap_btn.post_button_ref() if snap_btn is not None else None
+        post_btn = locate(driver, ref) if ref else None
+    else:
+        post_btn = _find_post_button(driver)
     if post_btn:
         try:
             _highlight(driver, post_btn, "red")
             logger.info("🖱️ clicando no botão de publicar")
             _sleep(0.12, 0.28)  # pequeno delay antes do clique
-            driver.execute_script("arguments[0].click();", post_btn)
+            jscall(driver, "click", post_btn)
         except Exception as e:
             logger.warning(f"Falha ao clicar no botão Post/Publicar: {e}; usando ENTER")
             try:
@@ -531,16 +665,20 @@ def do_comment(
     _sleep(0.7, 1.2)
 
     # Checa bloqueio pós-envio
-    if _detect_action_blocked(driver):
-        _cooldown_on_block()
-        return False
+    if snap is not None:
+        snap_after = take_snapshot(driver)
+        blocked = snap_after is not None and _snapshot_blocked(snap_after)
+    else:
+        blocked = _detect_action_blocked(driver)
+    if blocked:
+        return _cooldown_on_block(driver, profile_dir, "comment:envio")
 
     # Confirmação
     try:
         val = textarea.get_attribute("value") or ""
         logger.info(f"   pós-envio, length do textarea={len(val)}")
         if val.strip() == "":
-            mark_target_consumed(profile_dir, target.get("id", target.get("url", "")))
+            mark_target_consumed(profile_dir, _target_id(target))
             logger.info(
                 "✅ comentário aparentemente publicado (textarea vazio após envio)."
             )
@@ -553,10 +691,10 @@ def do_comment(
         found = driver.find_elements(By.XPATH, f"//*[contains(text(), {repr(frag)})]")
         logger.info(f"   busca por fragmento {frag!r} -> {len(found)} nós")
         if found:
-            mark_target_consumed(profile_dir, target.get("id", target.get("url", "")))
+            mark_target_consumed(profile_dir, _target_id(target))
             return True
     except Exception:
         pass
 
     logger.info("⚠️ não foi possível confirmar publicação do comentário.")
-    return False
+    return _fail(profile_dir, target, "unconfirmed")
@@ -5,10 +5,10 @@ import os
 import time
 import random
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from utils.logger import get_logger
+from utils.logger import get_logger, interruptible_sleep, stop_requested
 from utils.driver import wait_for_page_ready, set_geolocation_override
 
 logger = get_logger("auth")
@@ -16,8 +16,10 @@ logger = get_logger("auth")
 
 def _human_type(el, text: str, a: float = 0.04, b: float = 0.14) -> None:
     for ch in text:
+        if stop_requested():
+            raise InterruptedError("parada solicitada durante digitação")
         el.send_keys(ch)
-        time.sleep(random.uniform(a, b))
+        interruptible_sleep(random.uniform(a, b))
 
 
 def _find_visible(driver: WebDriver, by, selector, timeout: float = 3.0):
@@ -29,7 +31,8 @@ def _find_visible(driver: WebDriver, by, selector, timeout: float = 3.0):
                 return el
         except Exception:
             pass
-        time.sleep(0.15)
+        if not interruptible_sleep(0.15):
+            break
     return None
 
 
@@ -66,6 +69,71 @@ def _has_valid_profile(session_dir: Optional[str]) -> bool:
         return False
 
 
+# ---------- Validação rápida via cookie de sessão (CDP) ----------
+_SESSION_COOKIE = "sessionid"
+_IG_URL = "https://www.instagram.com/"
+# session_id do driver -> (válida?, quando foi checada)
+_SESSION_CACHE: Dict[str, Tuple[bool, float]] = {}
+
+
+def _recheck_secs() -> float:
+    try:
+        return float(os.getenv("AUTH_RECHECK_SECS", "600").strip())
+    except Exception:
+        return 600.0
+
+
+def _session_cookie_state(driver: WebDriver) -> Optional[bool]:
+    """
+    Lê o cookie `sessionid` do Instagram via CDP Network.getCookies (sem
+    navegar). True = presente e não expirado; False = ausente/expirado;
+    None = não foi possível consultar (sem CDP).
+    """
+    try:
+        res = driver.execute_cdp_cmd("Network.getCookies", {"urls": [_IG_URL]})
+    except Exception:
+        return None
+    for c in (res or {}).get("cookies", []):
+        if c.get("name") != _SESSION_COOKIE or not c.get("value"):
+            continue
+        expires = float(c.get("expires", -1) or -1)
+        # expires <= 0: cookie de sessão do browser (vale enquanto ele vive)
+        return expires <= 0 or expires > time.time()
+    return False
+
+
+def has_valid_session(driver: WebDriver, *, force: bool = False) -> Optional[bool]:
+    """
+    Resultado em cache do cookie de sessão; reconsulta após AUTH_RECHECK_SECS
+    (padrão 600s) ou quando `force`. None se o CDP não estiver disponível.
+    """
+    key = str(getattr(driver, "session_id", "") or id(driver))
+    cached = _SESSION_CACHE.get(key)
+    if not force and cached and (time.time() - cached[1]) < _recheck_secs():
+        return cached[0]
+    t0 = time.perf_counter()
+    state = _session_cookie_state(driver)
+    if state is None:
+        _SESSION_CACHE.pop(key, None)
+        return None
+    _SESSION_CACHE[key] = (state, time.time())
+    logger.info(
+        f"🍪 cookie de sessão {'válido' if state else 'ausente/expirado'} "
+        f"({(time.perf_counter() - t0) * 1000:.1f}ms)"
+    )
+    return state
+
+
+def _wait_session_cookie(driver: WebDriver, timeout: float = 8.0) -> Optional[bool]:
+    end = time.time() + timeout
+    state = has_valid_session(driver, force=True)
+    while state is False and time.time() < end:
+        if not interruptible_sleep(0.5):
+            break
+        state = has_valid_session(driver, force=True)
+    return state
+
+
 # ------------------------------------------------------
 
 
@@ -79,7 +147,7 @@ def _dismiss_popups(driver: WebDriver) -> None:
         )
         if btn:
             btn.click()
-            time.sleep(0.4)
+            interruptible_sleep(0.4)
     except Exception:
         pass
 
@@ -88,7 +156,7 @@ def _perform_login_minimal(driver: WebDriver, username: str, password: str) -> b
     try:
         driver.get("https://www.instagram.com/accounts/login/")
         wait_for_page_ready(driver, timeout=10.0)
-        time.sleep(random.uniform(0.5, 1.0))
+        interruptible_sleep(random.uniform(0.5, 1.0))
 
         user_el = _find_visible(driver, By.NAME, "username", timeout=3.0)
         pass_el = _find_visible(driver, By.NAME, "password", timeout=3.0)
@@ -104,7 +172,7 @@ def _perform_login_minimal(driver: WebDriver, username: str, password: str) -> b
         except Exception:
             pass
         _human_type(user_el, username, 0.03, 0.10)
-        time.sleep(random.uniform(0.2, 0.4))
+        interruptible_sleep(random.uniform(0.2, 0.4))
 
         try:
             pass_el.click()
@@ -112,7 +180,7 @@ def _perform_login_minimal(driver: WebDriver, username: str, password: str) -> b
         except Exception:
             pass
         _human_type(pass_el, password, 0.04, 0.12)
-        time.sleep(random.uniform(0.2, 0.4))
+        interruptible_sleep(random.uniform(0.2, 0.4))
 
         try:
             btn = _find_visible(
@@ -127,7 +195,7 @@ def _perform_login_minimal(driver: WebDriver, username: str, password: str) -> b
         except Exception:
             pass
 
-        time.sleep(2.0)
+        interruptible_sleep(2.0)
         _dismiss_popups(driver)
         return True
     except Exception as e:
@@ -142,8 +210,14 @@ def ensure_login(
     session_dir: Optional[str] = None,
     force: bool = False,
 ) -> bool:
-    # 1) Se há perfil válido, considera logado e sai.
-    if _has_valid_profile(session_dir):
+    # 1) Cookie de sessão via CDP: rápido e sem navegar.
+    cookie = None if force else has_valid_session(driver, force=True)
+    if cookie:
+        logger.info("Sessão válida pelo cookie 'sessionid' — pulando login.")
+        return True
+
+    # 1b) Sem CDP: heurística antiga de perfil válido em 'sessions'.
+    if cookie is None and not force and _has_valid_profile(session_dir):
         logger.info("Sessão detectada via perfil válido em 'sessions' — pulando login.")
         return True
 
@@ -153,10 +227,18 @@ def ensure_login(
     except Exception:
         logger.warning("Falha ao aplicar geolocalização.")
 
-    # 2) Tenta login apenas se não encontrou perfil válido
+    # 2) Tenta login: cookie ausente/expirado (ou perfil inexistente)
     ok = _perform_login_minimal(driver, username, password)
 
-    # 3) Revalida a existência de perfil após login
+    # 3) Confirma pelo cookie; sem CDP, revalida artefatos do perfil
+    cookie = _wait_session_cookie(driver)
+    if cookie:
+        logger.info("Sessão confirmada: cookie 'sessionid' presente após login.")
+        return True
+    if cookie is False:
+        logger.warning("Login executado, mas o cookie de sessão não apareceu.")
+        return False
+
     if _has_valid_profile(session_dir):
         logger.info("Sessão confirmada: artefatos de perfil presentes em 'sessions'.")
         return True
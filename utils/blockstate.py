@@ -0,0 +1,118 @@
+# utils/blockstate.py
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+import datetime as _dt
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("action")
+
+# Eventos guardados no arquivo (só para diagnóstico)
+_MAX_EVENTS = 50
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)).strip())
+    except Exception:
+        return default
+
+
+class BlockState:
+    """
+    Estado de bloqueio da conta ("Ação bloqueada"/rate limit), persistido por
+    perfil em <profile_dir>/block_state.json para sobreviver a reinícios.
+
+    Cada bloqueio sobe o nível de escalonamento: o cooldown sorteado em
+    ACTION_BLOCK_COOLDOWN_MIN..MAX (s) é multiplicado por 2^(nível-1), até
+    ACTION_BLOCK_MAX_HOURS. Sem novos bloqueios por ACTION_BLOCK_RESET_HOURS
+    após o fim do último cooldown, o nível volta a zero.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        base = Path(profile_dir) if profile_dir else Path("sessions/default")
+        base.mkdir(parents=True, exist_ok=True)
+        self.path = base / "block_state.json"
+
+    # ---------- persistência ----------
+    def _load(self) -> Dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save(self, data: Dict) -> None:
+        try:
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(
+                json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar block_state: {e}")
+
+    # ---------- consulta ----------
+    def _level(self, data: Dict, now: float) -> int:
+        reset = _env_float("ACTION_BLOCK_RESET_HOURS", 24.0) * 3600.0
+        if now - float(data.get("until", 0.0)) > reset:
+            return 0
+        return int(data.get("level", 0))
+
+    def remaining(self) -> float:
+        """Segundos até o fim do cooldown em vigor (0 se não bloqueado)."""
+        return max(0.0, float(self._load().get("until", 0.0)) - time.time())
+
+    def active(self) -> bool:
+        return self.remaining() > 0
+
+    def snapshot(self) -> Dict:
+        data = self._load()
+        return {
+            "level": self._level(data, time.time()),
+            "remaining_secs": round(self.remaining(), 1),
+            "last_reason": data.get("last_reason"),
+        }
+
+    # ---------- registro ----------
+    def record(self, reason: str = "") -> float:
+        """Registra um bloqueio e devolve a duração do cooldown (s)."""
+        now = time.time()
+        data = self._load()
+        level = self._level(data, now) + 1
+
+        cmin = _env_float("ACTION_BLOCK_COOLDOWN_MIN", 600.0)
+        cmax = max(cmin, _env_float("ACTION_BLOCK_COOLDOWN_MAX", 1800.0))
+        cap = _env_float("ACTION_BLOCK_MAX_HOURS", 48.0) * 3600.0
+        secs = min(cap, random.uniform(cmin, cmax) * (2 ** (level - 1)))
+
+        # bloqueio durante um cooldown ainda vigente nunca o encurta
+        until = max(float(data.get("until", 0.0)), now + secs)
+        events = list(data.get("events", []))[-(_MAX_EVENTS - 1) :]
+        events.append(
+            {
+                "at": _dt.datetime.now().isoformat(timespec="seconds"),
+                "level": level,
+                "cooldown_secs": round(secs),
+                "reason": reason,
+            }
+        )
+        self._save(
+            {
+                "level": level,
+                "until": until,
+                "last_reason": reason,
+                "events": events,
+            }
+        )
+        logger.warning(
+            f"🧊 bloqueio registrado (nível {level}, {reason or 'sem motivo'}): "
+            f"ações suspensas por {until - now:.0f}s"
+        )
+        return until - now
@@ -0,0 +1,356 @@
+# utils/cdp_backend.py
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.request import urlopen
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils import jslib
+from utils.logger import get_logger, interruptible_sleep, stop_requested
+
+try:  # cliente websocket (opcional; sem ele DRIVER_BACKEND=cdp fica no Selenium)
+    from websockets.asyncio.client import connect as _ws_connect
+except Exception:  # pragma: no cover - depende do ambiente / versão
+    try:
+        from websockets import connect as _ws_connect  # websockets < 13
+    except Exception:
+        _ws_connect = None
+
+logger = get_logger("cdp")
+
+# DRIVER_BACKEND=cdp → navegação, avaliação de JS, cliques e digitação falam
+# CDP direto pelo websocket do Chrome que o Selenium lançou (mesma aba, mesmos
+# cookies), com asyncio numa thread própria: comandos podem ir em pipeline e
+# eventos (load) chegam por assinatura em vez de polling. Qualquer falha
+# devolve None/False e o chamador segue pelo caminho Selenium.
+
+
+def backend_enabled() -> bool:
+    return (os.getenv("DRIVER_BACKEND", "selenium") or "").strip().lower() == "cdp"
+
+
+class CDPError(Exception):
+    pass
+
+
+# ---------- conexão CDP (ids, futures e assinantes de eventos) ----------
+class CDPConnection:
+    def __init__(self, ws: Any):
+        self.ws = ws
+        self.closed = False
+        self._id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._listeners: Dict[str, List[Callable[[Dict, Optional[str]], None]]] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def open(cls, url: str) -> "CDPConnection":
+        if _ws_connect is None:
+            raise CDPError("pacote 'websockets' não instalado")
+        # snapshots do DOM passam de 1MB: sem limite de mensagem
+        ws = await _ws_connect(url, max_size=None, compression=None)
+        conn = cls(ws)
+        conn._reader = asyncio.ensure_future(conn._read_loop())
+        return conn
+
+    async def _read_loop(self) -> None:
+        try:
+            async for msg in self.ws:
+                data = json.loads(msg)
+                if "id" in data:
+                    fut = self._pending.pop(data["id"], None)
+                    if fut is None or fut.done():
+                        continue
+                    if "error" in data:
+                        fut.set_exception(CDPError(str(data["error"])))
+                    else:
+                        fut.set_result(data.get("result", {}))
+                    continue
+                for cb in list(self._listeners.get(data.get("method", ""), [])):
+                    try:
+                        cb(data.get("params", {}), data.get("sessionId"))
+                    except Exception:
+                        pass
+        except Exception:
+            pass
+        finally:
+            self.closed = True
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(CDPError("websocket CDP fechado"))
+            self._pending.clear()
+
+    async def send(
+        self,
+        method: str,
+        params: Optional[Dict] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict:
+        """Envia e espera a resposta; vários send() num gather = pipeline."""
+        if self.closed:
+            raise CDPError("websocket CDP fechado")
+        self._id += 1
+        msg: Dict[str, Any] = {"id": self._id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[self._id] = fut
+        try:
+            await self.ws.send(json.dumps(msg))
+        except Exception as e:
+            self._pending.pop(msg["id"], None)
+            raise CDPError(f"falha ao enviar {method}: {e}")
+        return await fut
+
+    def on(self, method: str, cb: Callable[[Dict, Optional[str]], None]) -> None:
+        self._listeners.setdefault(method, []).append(cb)
+
+    def off(self, method: str, cb: Callable[[Dict, Optional[str]], None]) -> None:
+        try:
+            self._listeners.get(method, []).remove(cb)
+        except ValueError:
+            pass
+
+    def expect(
+        self, method: str, predicate: Callable[[Dict, Optional[str]], bool]
+    ) -> asyncio.Future:
+        """
+        Future do próximo evento `method` que satisfaz `predicate`. Assina na
+        hora (chame antes do comando que o dispara); cancelar desassina.
+        """
+        fut = asyncio.get_running_loop().create_future()
+
+        def _cb(params: Dict, sid: Optional[str]) -> None:
+            if not fut.done() and predicate(params, sid):
+                fut.set_result(params)
+
+        self.on(method, _cb)
+        fut.add_done_callback(lambda _f: self.off(method, _cb))
+        return fut
+
+    def close(self) -> None:
+        asyncio.ensure_future(self.ws.close())
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+# ---------- loop asyncio em thread própria ----------
+class _LoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, daemon=True, name="cdp-loop"
+        )
+        self.thread.start()
+
+    def run(self, coro, timeout: float) -> Any:
+        fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return fut.result(timeout)
+        except Exception:
+            fut.cancel()
+            raise
+
+
+_LOOP: Optional[_LoopThread] = None
+_LOOP_LOCK = threading.Lock()
+
+
+def _loop() -> _LoopThread:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = _LoopThread()
+        return _LOOP
+
+
+# ---------- fachada síncrona por aba ----------
+class CDPPage:
+    """Uma aba (target) anexada em modo flatten: API síncrona para o worker."""
+
+    def __init__(self, conn: CDPConnection, session_id: str, target_id: str):
+        self.conn = conn
+        self.session_id = session_id
+        self.target_id = target_id
+
+    def _run(self, coro, timeout: float = 15.0) -> Any:
+        return _loop().run(coro, timeout)
+
+    def _cmd(self, method: str, params: Optional[Dict] = None):
+        return self.conn.send(method, params, self.session_id)
+
+    @property
+    def alive(self) -> bool:
+        return not self.conn.closed
+
+    # navegação: espera o evento de load (assinado antes do comando)
+    def navigate(self, url: str, timeout: float = 30.0) -> bool:
+        sid = self.session_id
+
+        async def _go() -> bool:
+            load = self.conn.expect("Page.loadEventFired", lambda p, s: s == sid)
+            try:
+                res = await self._cmd("Page.navigate", {"url": url})
+            except Exception:
+                load.cancel()
+                raise
+            if res.get("errorText"):
+                load.cancel()
+                raise CDPError(res["errorText"])
+            if not res.get("loaderId"):  # mesma página (âncora/rota): sem load
+                load.cancel()
+                return True
+            await asyncio.wait_for(load, timeout)
+            return True
+
+        return self._run(_go(), timeout + 2.0)
+
+    def evaluate(self, expression: str, timeout: float = 15.0) -> Any:
+        async def _ev() -> Any:
+            res = await self._cmd(
+                "Runtime.evaluate",
+                {"expression": expression, "returnByValue": True, "awaitPromise": True},
+            )
+            if res.get("exceptionDetails"):
+                det = res["exceptionDetails"]
+                msg = (det.get("exception") or {}).get("description") or det.get("text")
+                raise CDPError(f"exceção JS: {msg}")
+            return (res.get("result") or {}).get("value")
+
+        return self._run(_ev(), timeout)
+
+    def lib(self, name: str, *args: Any, timeout: float = 15.0) -> Any:
+        """Chama a biblioteca de utils/jslib pelo nome (instala se faltar)."""
+        expr = (
+            "(function(){var L=window[%s]; if(!L) return {__igpy_missing__: 1};"
+            " return L[%s].apply(L, %s);})()"
+            % (json.dumps(jslib.JS_NAMESPACE), json.dumps(name), json.dumps(list(args)))
+        )
+        res = self.evaluate(expr, timeout)
+        if isinstance(res, dict) and res.get("__igpy_missing__"):
+            self.evaluate(jslib.source(), timeout)
+            res = self.evaluate(expr, timeout)
+        return res
+
+    def click_ref(self, attr: str, ref: str) -> bool:
+        """
+        Clique "de verdade" (Input.dispatchMouseEvent) no centro do elemento;
+        mover/pressionar/soltar vão em pipeline numa única espera.
+        """
+        box = self.evaluate(
+            "(function(){var el=document.querySelector(%s); if(!el) return null;"
+            " el.scrollIntoView({block:'center',inline:'center'});"
+            " var r=el.getBoundingClientRect(); return [r.left+r.width/2, r.top+r.height/2];})()"
+            % json.dumps(f'[{attr}="{ref}"]')
+        )
+        if not box:
+            return False
+        x, y = float(box[0]), float(box[1])
+
+        async def _click() -> bool:
+            base = {"x": x, "y": y, "button": "left", "clickCount": 1}
+            cmds = [
+                self._cmd(
+                    "Input.dispatchMouseEvent", {"type": "mouseMoved", "x": x, "y": y}
+                ),
+                self._cmd("Input.dispatchMouseEvent", {"type": "mousePressed", **base}),
+                self._cmd(
+                    "Input.dispatchMouseEvent", {"type": "mouseReleased", **base}
+                ),
+            ]
+            await asyncio.gather(*cmds)
+            return True
+
+        return self._run(_click())
+
+    def type_text(
+        self, text: str, min_delay: float = 0.03, max_delay: float = 0.12
+    ) -> bool:
+        """Digita no elemento focado, caractere a caractere, com pausas humanas."""
+        for ch in text:
+            if stop_requested():
+                return False
+            self._run(self._cmd("Input.insertText", {"text": ch}))
+            interruptible_sleep(random.uniform(min_delay, max_delay))
+        return True
+
+
+# ---------- registro por driver/aba ----------
+_CONNS: Dict[str, CDPConnection] = {}  # session_id do Selenium → conexão do browser
+_PAGES: Dict[Tuple[str, str], CDPPage] = {}
+_FAILED: Set[str] = set()
+_REG_LOCK = threading.Lock()
+
+
+def _browser_ws_url(driver: WebDriver) -> str:
+    addr = (driver.capabilities.get("goog:chromeOptions") or {}).get("debuggerAddress")
+    if not addr:
+        raise CDPError("debuggerAddress ausente nas capabilities")
+    with urlopen(f"http://{addr}/json/version", timeout=5.0) as r:
+        return json.loads(r.read().decode("utf-8"))["webSocketDebuggerUrl"]
+
+
+def get_page(driver: WebDriver, handle: Optional[str] = None) -> Optional[CDPPage]:
+    """
+    Aba atual (ou `handle`) no backend CDP; None se DRIVER_BACKEND != cdp ou se
+    o backend falhou para este driver (aí o Selenium segue sozinho).
+    """
+    if not backend_enabled() or driver is None:
+        return None
+    sid = str(getattr(driver, "session_id", ""))
+    if sid in _FAILED:
+        return None
+    try:
+        handle = handle or driver.current_window_handle
+        key = (sid, handle)
+        with _REG_LOCK:
+            page = _PAGES.get(key)
+            if page is not None and page.alive:
+                return page
+            conn = _CONNS.get(sid)
+            if conn is None or conn.closed:
+                url = _browser_ws_url(driver)
+                conn = _loop().run(CDPConnection.open(url), 10.0)
+                _CONNS[sid] = conn
+                logger.info(f"🔌 backend CDP conectado: {url}")
+            target_id = handle.replace("CDwindow-", "")
+
+            async def _attach() -> str:
+                res = await conn.send(
+                    "Target.attachToTarget", {"targetId": target_id, "flatten": True}
+                )
+                session = res["sessionId"]
+                await asyncio.gather(
+                    conn.send("Page.enable", {}, session),
+                    conn.send("Runtime.runIfWaitingForDebugger", {}, session),
+                )
+                return session
+
+            session = _loop().run(_attach(), 10.0)
+            page = _PAGES[key] = CDPPage(conn, session, target_id)
+            return page
+    except Exception as e:
+        _FAILED.add(sid)
+        logger.warning(f"Backend CDP indisponível ({e}); seguindo com Selenium.")
+        return None
+
+
+def release(driver: WebDriver) -> None:
+    """Fecha a conexão CDP de um driver que está sendo encerrado."""
+    sid = str(getattr(driver, "session_id", ""))
+    with _REG_LOCK:
+        for key in [k for k in _PAGES if k[0] == sid]:
+            _PAGES.pop(key, None)
+        conn = _CONNS.pop(sid, None)
+        _FAILED.discard(sid)
+    if conn is not None and _LOOP is not None:
+        try:
+            _LOOP.loop.call_soon_threadsafe(conn.close)
+        except Exception:
+            pass
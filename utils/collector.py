@@ -1,17 +1,23 @@
 # utils/collector.py
 from __future__ import annotations
 
+import os
+import json
+import time
 import hashlib
 import datetime as _dt
 from pathlib import Path
-from typing import List, Dict, Iterator, Optional, Set
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 from urllib.parse import quote
 
-from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 
-from utils.driver import wait_for_page_ready
-from utils.logger import get_logger, human_sleep
+from utils.cdp_backend import get_page
+from utils.driver import wait_for_page_ready, get_main_handle
+from utils.logger import get_logger, human_sleep, interruptible_sleep, stop_requested
+from utils.navperf import begin_capture
+from utils.recorder import record_page
+from utils.tag_scheduler import TagScheduler
 
 logger = get_logger("collector")
 
@@ -76,6 +82,113 @@ def mark_target_consumed(profile_dir: Optional[str], target_id: str) -> None:
         pass
 
 
+# ---------- Cache de falhas (negativo) por perfil ----------
+
+# TTL base por código de motivo (segundos); dobra a cada falha repetida.
+FAIL_REASON_TTLS: Dict[str, float] = {
+    "nav": 15 * 60,  # navegação falhou (pode ser transitório)
+    "no_like_button": 6 * 3600,  # post sem botão curtir (removido/privado)
+    "no_textarea": 6 * 3600,  # comentários desativados
+    "unconfirmed": 2 * 3600,  # clique/envio sem confirmação
+    "type_failed": 30 * 60,
+}
+_DEFAULT_FAIL_TTL = 3600.0
+
+
+def _failed_path(profile_dir: Optional[str]) -> Path:
+    return _profile_base(profile_dir) / "failed_targets.jsonl"
+
+
+def _fail_ttl_scale() -> float:
+    try:
+        return max(0.0, float(os.getenv("FAIL_CACHE_TTL_SCALE", "1.0")))
+    except Exception:
+        return 1.0
+
+
+def _fail_ttl_max() -> float:
+    try:
+        return max(0.0, float(os.getenv("FAIL_CACHE_MAX_HOURS", "72"))) * 3600.0
+    except Exception:
+        return 72 * 3600.0
+
+
+def _read_failures(p: Path) -> List[Dict]:
+    if not p.exists():
+        return []
+    rows: List[Dict] = []
+    try:
+        for line in p.read_text(encoding="utf-8").splitlines():
+            try:
+                r = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(r, dict) and r.get("id"):
+                rows.append(r)
+    except Exception:
+        return []
+    return rows
+
+
+def _load_suppressed(profile_dir: Optional[str]) -> Dict[str, float]:
+    """
+    IDs com falha recente → instante (epoch) até quando ficam suprimidos.
+    Supressão = último registro + TTL(motivo) * 2^(falhas-1), limitado a
+    FAIL_CACHE_MAX_HOURS. Registros fora da janela são compactados do arquivo.
+    """
+    scale = _fail_ttl_scale()
+    if scale <= 0:
+        return {}
+    p = _failed_path(profile_dir)
+    rows = _read_failures(p)
+    if not rows:
+        return {}
+    now = time.time()
+    cap = _fail_ttl_max()
+    by_id: Dict[str, List[Dict]] = {}
+    for r in rows:
+        if now - float(r.get("ts", 0)) <= cap:
+            by_id.setdefault(r["id"], []).append(r)
+
+    suppressed: Dict[str, float] = {}
+    for tid, recs in by_id.items():
+        last = max(recs, key=lambda r: float(r.get("ts", 0)))
+        base = FAIL_REASON_TTLS.get(last.get("reason", ""), _DEFAULT_FAIL_TTL)
+        ttl = min(cap, base * scale * (2 ** (len(recs) - 1)))
+        until = float(last.get("ts", 0)) + ttl
+        if until > now:
+            suppressed[tid] = until
+
+    kept = sum(len(v) for v in by_id.values())
+    if kept < len(rows):
+        try:
+            tmp = p.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                for recs in by_id.values():
+                    for r in recs:
+                        f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            os.replace(tmp, p)
+        except Exception:
+            pass
+    if suppressed:
+        logger.info(f"🚷 {len(suppressed)} alvos suprimidos por falhas recentes.")
+    return suppressed
+
+
+def mark_target_failed(profile_dir: Optional[str], target_id: str, reason: str) -> None:
+    """Registra falha de um alvo com código de motivo (ver FAIL_REASON_TTLS)."""
+    try:
+        gid = (target_id or "").strip()
+        if not gid:
+            return
+        rec = {"id": gid, "reason": reason, "ts": round(time.time(), 3)}
+        with _failed_path(profile_dir).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except Exception:
+        # não bloquear o fluxo se falhar
+        pass
+
+
 # ------------------------------------------------------------
 
 
@@ -83,134 +196,351 @@ def _mk_id(url: str) -> str:
     return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
 
 
-def _open_keyword_page(driver: WebDriver, keyword: str) -> None:
+def _keyword_url(keyword: str) -> str:
     # Mantém exatamente o recurso indicado por você
-    url = (
+    return (
         f"https://www.instagram.com/explore/search/keyword/?q={quote(keyword.strip())}"
     )
+
+
+def _open_keyword_page(driver: WebDriver, keyword: str) -> None:
+    url = _keyword_url(keyword)
     logger.info(f"🧭 abrindo keyword: {url}")
+    cap = begin_capture(driver, f"kw:{keyword}", "keyword")
     driver.get(url)
     wait_for_page_ready(driver, timeout=12.0)
+    if cap is not None:
+        cap.finish(driver, url=url, method="full")
     human_sleep((0.8, 1.6), reason=f"abrir keyword '{keyword}'", logger=logger)
+    record_page(driver, "keyword", keyword)
 
 
-def _collect_visible_links(driver: WebDriver, limit: int) -> List[str]:
+def _collect_visible_links(driver: WebDriver, limit: Optional[int] = None) -> List[str]:
+    """Todos os hrefs de posts/reels no DOM, em ordem, numa única ida ao browser."""
+    css = "a[href*='/p/'], a[href*='/reel/']"
+    hrefs = None
+    page = get_page(driver)
+    if page is not None:
+        try:
+            hrefs = page.lib("hrefs", css) or []
+        except Exception:
+            hrefs = None
+    if hrefs is None:
+        try:
+            hrefs = (
+                driver.execute_script(
+                    "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);",
+                    css,
+                )
+                or []
+            )
+        except Exception:
+            hrefs = []
     urls: List[str] = []
     seen = set()
+    for href in hrefs:
+        if href and href not in seen:
+            seen.add(href)
+            urls.append(href)
+            if limit is not None and len(urls) >= limit:
+                break
+    return urls
+
+
+# ---------- Abas por tag / cursores de scroll retomáveis ----------
+# session_id -> {tag: window_handle}
+_TAG_TABS: Dict[str, Dict[str, str]] = {}
+# (session_id, tag) -> (scrollY, timestamp)
+_TAG_CURSORS: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+
+def _tabs_enabled() -> bool:
+    v = os.getenv("COLLECT_TAG_TABS", "false").strip().lower()
+    return v in ("1", "true", "yes", "y", "on")
+
+
+def _cursor_ttl() -> float:
+    try:
+        return float(os.getenv("COLLECT_CURSOR_TTL", "1800").strip())
+    except Exception:
+        return 1800.0
+
+
+def _session_key(driver: WebDriver) -> str:
+    return str(getattr(driver, "session_id", "") or id(driver))
+
+
+def _fast_forward(driver: WebDriver, target_y: int, timeout: float = 20.0) -> int:
+    """
+    Leva a página de volta até `target_y` pulando direto para o fim repetidas
+    vezes (dispara o carregamento infinito) sem pausas humanas nem coleta.
+    """
+    end = time.time() + timeout
+    last_h = -1
+    stalled = 0
+    while time.time() < end:
+        try:
+            h = int(
+                driver.execute_script(
+                    "window.scrollTo(0, document.documentElement.scrollHeight);"
+                    "return document.documentElement.scrollHeight;"
+                )
+                or 0
+            )
+        except Exception:
+            break
+        if h >= target_y + 1000:
+            break
+        stalled = stalled + 1 if h <= last_h else 0
+        if stalled >= 4:
+            break
+        last_h = h
+        if not interruptible_sleep(0.35):
+            break
     try:
-        cards = driver.find_elements(
-            By.CSS_SELECTOR, "a[href*='/p/'], a[href*='/reel/']"
+        return int(
+            driver.execute_script(
+                "window.scrollTo(0, arguments[0]); return Math.floor(window.scrollY);",
+                int(target_y),
+            )
+            or 0
         )
     except Exception:
-        cards = []
-    for a in cards:
+        return 0
+
+
+def _enter_tag_page(driver: WebDriver, tag: str) -> bool:
+    """
+    Posiciona o driver na página da tag. Retorna True se retomou de onde a
+    coleta anterior parou (aba mantida aberta ou cursor de scroll restaurado).
+    """
+    sk = _session_key(driver)
+    cursor = _TAG_CURSORS.get((sk, tag))
+    fresh = cursor is not None and (time.time() - cursor[1]) < _cursor_ttl()
+
+    if _tabs_enabled():
+        tabs = _TAG_TABS.setdefault(sk, {})
+        handle = tabs.get(tag)
+        if handle and handle in driver.window_handles:
+            driver.switch_to.window(handle)
+            if fresh:
+                logger.info(f"📑 retomando aba da tag '{tag}' (y={cursor[0]})")
+                return True
+            # aba velha: recarrega do topo
+            _open_keyword_page(driver, tag)
+            return False
+        driver.switch_to.new_window("tab")
+        tabs[tag] = driver.current_window_handle
+        _open_keyword_page(driver, tag)
+        return False
+
+    _open_keyword_page(driver, tag)
+    if fresh and cursor[0] > 0:
+        y = _fast_forward(driver, cursor[0])
+        logger.info(f"⏩ cursor da tag '{tag}' restaurado: y={y} (alvo {cursor[0]})")
+        return True
+    return False
+
+
+def _save_tag_cursor(driver: WebDriver, tag: str) -> None:
+    try:
+        y = int(driver.execute_script("return Math.floor(window.scrollY);") or 0)
+    except Exception:
+        return
+    _TAG_CURSORS[(_session_key(driver), tag)] = (y, time.time())
+
+
+def close_tag_tabs(driver: WebDriver) -> None:
+    """Fecha as abas de coleta mantidas para este driver (se houver)."""
+    tabs = _TAG_TABS.pop(_session_key(driver), {})
+    if not tabs:
+        return
+    try:
+        current = driver.current_window_handle
+    except Exception:
+        current = None
+    for handle in tabs.values():
+        if handle == current:
+            continue
         try:
-            href = a.get_attribute("href")
-            if href and href not in seen:
-                seen.add(href)
-                urls.append(href)
-                if len(urls) >= limit:
-                    break
+            driver.switch_to.window(handle)
+            driver.close()
         except Exception:
+            pass
+    try:
+        if current:
+            driver.switch_to.window(current)
+    except Exception:
+        pass
+
+
+def _scroll_page(driver: WebDriver) -> None:
+    try:
+        driver.execute_script("window.scrollBy(0, Math.floor(window.innerHeight*0.9));")
+    except Exception:
+        pass
+
+
+def _harvest_visible(
+    driver: WebDriver,
+    tag: str,
+    limit: int,
+    consumed: Set[str],
+    seen_ids_exec: Set[str],
+    exclude_ids: Set[str],
+) -> List[Dict]:
+    """Cartões no DOM ainda não vistos/consumidos (até `limit`)."""
+    batch: List[Dict] = []
+    if limit <= 0:
+        return batch
+    # todos os hrefs: numa aba retomada os primeiros cartões já foram vistos
+    for url in _collect_visible_links(driver):
+        tid = _mk_id(url)
+        if tid in consumed or tid in seen_ids_exec or tid in exclude_ids:
             continue
-    return urls
+        batch.append({"id": tid, "url": url, "source": f"kw:{tag}"})
+        seen_ids_exec.add(tid)
+        if len(batch) >= limit:
+            break
+    return batch
 
 
-def collect_for_tags(
+def _leave_tag_page(driver: WebDriver, origin_handle: Optional[str]) -> None:
+    """Devolve o foco à aba principal antes de entregar alvos ao consumidor."""
+    # a aba principal pode ter sido trocada (pré-carregamento/reciclagem)
+    handle = get_main_handle(driver, origin_handle)
+    if handle and _tabs_enabled():
+        try:
+            driver.switch_to.window(handle)
+        except Exception:
+            pass
+
+
+def _return_to_tag_page(driver: WebDriver, tag: str) -> None:
+    """Volta à página da tag se o consumidor navegou para outro lugar."""
+    if not _tabs_enabled():
+        try:
+            if (driver.current_url or "").startswith(_keyword_url(tag)):
+                return
+        except Exception:
+            pass
+    _enter_tag_page(driver, tag)
+
+
+def iter_collect_for_tags(
     driver: WebDriver,
     tags: Optional[List[str]] = None,
     locations: Optional[List[str]] = None,  # reservado p/ futuras estratégias
     max_links: int = 20,
     profile_dir: Optional[str] = None,
-) -> List[Dict]:
+    exclude_ids: Optional[Set[str]] = None,
+) -> Iterator[Dict]:
     """
-    Visita cada tag (keyword) em /explore/search/keyword/?q=<tag> e extrai links únicos
-    de posts/reels, ignorando quaisquer URLs previamente consumidas (persistidas).
-    Retorna uma lista de dicts: {"id": <hash>, "url": <url>, "source": "kw:<tag>"}.
+    Versão em streaming de `collect_for_tags`: entrega cada alvo assim que ele
+    passa pelos filtros de consumidos/dedupe, sem esperar a coleta inteira.
+
+    Entre um alvo e outro o consumidor pode usar o driver (ex.: executar a
+    ação): os alvos são entregues com o foco na aba de origem e, na retomada,
+    a coleta volta à aba da tag ou reabre a página no cursor salvo.
+    `exclude_ids` é consultado a cada colheita (pode ser o set de alvos já
+    usados pelo orquestrador, atualizado em tempo real).
     """
     tags = [t for t in (tags or []) if t and t.strip()]
     if not tags:
         logger.warning("Nenhuma tag informada para coleta.")
-        return []
+        return
 
-    consumed = _load_consumed(profile_dir)
-    results: List[Dict] = []
+    consumed = _load_consumed(profile_dir) | set(_load_suppressed(profile_dir))
     seen_ids_exec: Set[str] = set()  # dedupe intra-execução
+    skip = exclude_ids if exclude_ids is not None else set()
 
-    for tag in tags:
-        try:
-            _open_keyword_page(driver, tag)
-        except Exception as e:
-            logger.warning(f"Falha ao abrir keyword '{tag}': {e}")
-            continue
-
-        # Pequenos scrolls para carregar mais cartões (mantido do estável)
-        for _ in range(3):
-            try:
-                driver.execute_script(
-                    "window.scrollBy(0, Math.floor(window.innerHeight*0.9));"
-                )
-            except Exception:
-                pass
-            human_sleep((0.6, 1.1), reason="scroll leve", logger=logger)
+    scheduler = TagScheduler(tags, profile_dir)
+    plan = scheduler.plan(max_links, max_per_tag=max(3, min(12, max_links // 5)) + 3)
+    logger.info(f"🗓️ plano de scrolls por tag: {plan}")
 
-        # Coleta visível inicial
-        needed = max_links - len(results)
-        if needed <= 0:
-            break
+    try:
+        origin_handle = driver.current_window_handle
+    except Exception:
+        origin_handle = None
 
-        links = _collect_visible_links(driver, limit=needed * 2)  # pega um pouco a mais
-        for url in links:
-            tid = _mk_id(url)
-            if tid in consumed or tid in seen_ids_exec:
-                continue
-            results.append({"id": tid, "url": url, "source": f"kw:{tag}"})
-            seen_ids_exec.add(tid)
-            if len(results) >= max_links:
+    yielded = 0
+    try:
+        for tag, budget in plan:
+            if yielded >= max_links or stop_requested():
                 break
-
-        if len(results) >= max_links:
-            break
-
-        # ----- Scroll incremental adicional, se ainda não atingiu o limite -----
-        # Mantém comportamento original e apenas amplia quando necessário.
-        extra_scrolls = max(3, min(12, max_links // 5))
-        sc = 0
-        while len(results) < max_links and sc < extra_scrolls:
-            sc += 1
             try:
-                driver.execute_script(
-                    "window.scrollBy(0, Math.floor(window.innerHeight*0.9));"
-                )
-            except Exception:
-                pass
-            human_sleep((0.7, 1.4), reason=f"scroll extra ({sc})", logger=logger)
+                _enter_tag_page(driver, tag)
+            except Exception as e:
+                logger.warning(f"Falha ao abrir keyword '{tag}': {e}")
+                scheduler.record(tag, 1, 0)
+                continue
 
-            # Coleta mais cartões após cada scroll extra
-            needed = max_links - len(results)
-            if needed <= 0:
-                break
-            more = _collect_visible_links(driver, limit=max(needed * 2, 24))
-            added = 0
-            for url in more:
-                tid = _mk_id(url)
-                if tid in consumed or tid in seen_ids_exec:
-                    continue
-                results.append({"id": tid, "url": url, "source": f"kw:{tag}"})
-                seen_ids_exec.add(tid)
-                added += 1
-                if len(results) >= max_links:
-                    break
-
-            logger.info(
-                f"[{tag}] scroll extra {sc}: +{added} links (total {len(results)}/{max_links})"
-            )
+            added_tag = 0
+            sc = 0
+            try:
+                while True:
+                    batch = _harvest_visible(
+                        driver, tag, max_links - yielded, consumed, seen_ids_exec, skip
+                    )
+                    added_tag += len(batch)
+                    if sc:
+                        logger.info(
+                            f"[{tag}] scroll {sc}/{budget}: +{len(batch)} links "
+                            f"(total {yielded + len(batch)}/{max_links})"
+                        )
+                    if batch:
+                        _save_tag_cursor(driver, tag)
+                        _leave_tag_page(driver, origin_handle)
+                        for item in batch:
+                            yield item
+                            yielded += 1
+                        if yielded >= max_links or sc >= budget:
+                            break
+                        _return_to_tag_page(driver, tag)
+                    elif sc >= budget:
+                        _save_tag_cursor(driver, tag)
+                        break
+
+                    if stop_requested():
+                        break
+                    # Scroll incremental dentro da fatia de orçamento desta tag
+                    sc += 1
+                    _scroll_page(driver)
+                    human_sleep(
+                        (0.7, 1.4), reason=f"scroll ({sc}/{budget})", logger=logger
+                    )
+            finally:
+                scheduler.record(tag, sc + 1, added_tag)
+                logger.info(f"🏷️ tag '{tag}': +{added_tag} links em {sc + 1} scrolls")
+    finally:
+        _leave_tag_page(driver, origin_handle)
+        scheduler.save()
+        logger.info(f"Coleta finalizou com {yielded} links (limite={max_links}).")
 
-        if len(results) >= max_links:
-            break
 
-    logger.info(f"Coleta finalizou com {len(results)} links (limite={max_links}).")
-    return results
+def collect_for_tags(
+    driver: WebDriver,
+    tags: Optional[List[str]] = None,
+    locations: Optional[List[str]] = None,  # reservado p/ futuras estratégias
+    max_links: int = 20,
+    profile_dir: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Visita as tags (keywords) em /explore/search/keyword/?q=<tag> e extrai links
+    únicos de posts/reels, ignorando quaisquer URLs previamente consumidas
+    (persistidas). O orçamento de scrolls é distribuído pelo TagScheduler de
+    acordo com o rendimento recente de cada tag (links novos por scroll).
+    Retorna uma lista de dicts: {"id": <hash>, "url": <url>, "source": "kw:<tag>"}.
+    """
+    return list(
+        iter_collect_for_tags(
+            driver,
+            tags=tags,
+            locations=locations,
+            max_links=max_links,
+            profile_dir=profile_dir,
+        )
+    )
 
 
 def get_next_target(iterable: Iterator[dict]) -> Optional[dict]:
@@ -0,0 +1,257 @@
+# utils/domsnap.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils.cdp_backend import get_page
+from utils.jslib import call as jscall
+from utils.logger import get_logger
+
+try:  # parser em C, bem mais rápido em páginas grandes (opcional)
+    import lxml.html as _lxml_html
+except Exception:  # pragma: no cover - depende do ambiente
+    _lxml_html = None
+
+logger = get_logger("action")
+
+REF_ATTR = "data-igpy-ref"
+
+_LIKE_LABELS = {"curtir", "like"}
+_UNLIKE_LABELS = {"descurtir", "unlike"}
+_POST_TEXTS = {"post", "publicar"}
+_WARN_ROLES = {"alert", "status", "dialog"}
+
+
+@dataclass
+class PostSnapshot:
+    """Estado do post decidido localmente a partir de um snapshot do DOM."""
+
+    like_refs: List[str] = field(default_factory=list)
+    unlike_refs: List[str] = field(default_factory=list)
+    textareas: List[Tuple[str, str]] = field(default_factory=list)  # (aria, ref)
+    post_buttons: List[Tuple[str, str]] = field(default_factory=list)  # (texto, ref)
+    submit_refs: List[str] = field(default_factory=list)
+    notices: List[str] = field(default_factory=list)  # textos de alert/dialog
+    size: int = 0
+
+    def blocked_text(self, patterns: List[str]) -> Optional[str]:
+        for txt in self.notices:
+            low = txt.lower()
+            for frag in patterns:
+                if frag.lower() in low:
+                    return txt
+        return None
+
+    def textarea_ref(self, labels: List[str]) -> Optional[str]:
+        for want in labels:
+            for aria, ref in self.textareas:
+                if aria == want:
+                    return ref
+        for aria, ref in self.textareas:
+            if "coment" in aria.lower() or "comment" in aria.lower():
+                return ref
+        return None
+
+    def post_button_ref(self) -> Optional[str]:
+        for text, ref in self.post_buttons:
+            if text.strip().lower() in _POST_TEXTS:
+                return ref
+        return self.submit_refs[0] if self.submit_refs else None
+
+
+def _is_icon24(attrs: Dict[str, str]) -> bool:
+    return attrs.get("width") == "24" and attrs.get("height") == "24"
+
+
+class _SnapshotParser(HTMLParser):
+    """Uma passada pelo HTML; mantém só o que as decisões precisam."""
+
+    _VOID = {
+        "area",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "source",
+        "wbr",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.snap = PostSnapshot()
+        self._stack: List[str] = []
+        self._collect: List[Tuple[int, str, str, List[str]]] = (
+            []
+        )  # (depth, kind, ref, buf)
+        self._skip = 0  # dentro de <script>/<style>
+
+    def handle_starttag(self, tag, attrs):
+        a = {k: (v or "") for k, v in attrs}
+        ref = a.get(REF_ATTR, "")
+        if tag in ("script", "style"):
+            self._skip += 1
+        if tag == "svg" and ref and _is_icon24(a):
+            label = a.get("aria-label", "").strip().lower()
+            if label in _LIKE_LABELS:
+                self.snap.like_refs.append(ref)
+            elif label in _UNLIKE_LABELS:
+                self.snap.unlike_refs.append(ref)
+        elif tag == "textarea" and ref:
+            self.snap.textareas.append((a.get("aria-label", ""), ref))
+        elif (
+            tag == "button"
+            and ref
+            and a.get("type") == "submit"
+            and "disabled" not in a
+        ):
+            self.snap.submit_refs.append(ref)
+        if tag in self._VOID:
+            return
+        self._stack.append(tag)
+        depth = len(self._stack)
+        if ref and tag == "div" and a.get("role") == "button":
+            self._collect.append((depth, "button", ref, []))
+        if ref and (
+            a.get("role") in _WARN_ROLES
+            or a.get("aria-live") in ("polite", "assertive")
+        ):
+            self._collect.append((depth, "notice", ref, []))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self._VOID and self._stack and self._stack[-1] == tag:
+            self._close(len(self._stack))
+            self._stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+        if tag in self._VOID or tag not in self._stack:
+            return
+        # fecha até a tag correspondente (HTML real nem sempre é bem formado)
+        while self._stack:
+            depth = len(self._stack)
+            top = self._stack.pop()
+            self._close(depth)
+            if top == tag:
+                break
+
+    def _close(self, depth: int) -> None:
+        while self._collect and self._collect[-1][0] >= depth:
+            _, kind, ref, buf = self._collect.pop()
+            text = " ".join(" ".join(buf).split())
+            if kind == "button":
+                self.snap.post_buttons.append((text, ref))
+            elif text:
+                self.snap.notices.append(text)
+
+    def handle_data(self, data):
+        if self._skip or not self._collect:
+            return
+        for _, _, _, buf in self._collect:
+            buf.append(data)
+
+
+def _analyze_lxml(html: str) -> PostSnapshot:
+    snap = PostSnapshot()
+    doc = _lxml_html.fromstring(html)
+    for el in doc.iter():
+        if not isinstance(el.tag, str):
+            continue
+        ref = el.get(REF_ATTR)
+        if not ref:
+            continue
+        tag = el.tag.lower()
+        if tag == "svg" and _is_icon24(el.attrib):
+            label = (el.get("aria-label") or "").strip().lower()
+            if label in _LIKE_LABELS:
+                snap.like_refs.append(ref)
+            elif label in _UNLIKE_LABELS:
+                snap.unlike_refs.append(ref)
+        elif tag == "textarea":
+            snap.textareas.append((el.get("aria-label") or "", ref))
+        elif (
+            tag == "button"
+            and el.get("type") == "submit"
+            and el.get("disabled") is None
+        ):
+            snap.submit_refs.append(ref)
+        if tag == "div" and el.get("role") == "button":
+            snap.post_buttons.append((" ".join(el.text_content().split()), ref))
+        if el.get("role") in _WARN_ROLES or el.get("aria-live") in (
+            "polite",
+            "assertive",
+        ):
+            text = " ".join(el.text_content().split())
+            if text:
+                snap.notices.append(text)
+    return snap
+
+
+def analyze_html(html: str) -> PostSnapshot:
+    """Decide o estado do post a partir do HTML (lxml se houver, senão stdlib)."""
+    if _lxml_html is not None:
+        try:
+            snap = _analyze_lxml(html)
+            snap.size = len(html)
+            return snap
+        except Exception:
+            pass
+    p = _SnapshotParser()
+    p.feed(html)
+    p.close()
+    p._close(0)
+    p.snap.size = len(html)
+    return p.snap
+
+
+def take_snapshot(driver: WebDriver) -> Optional[PostSnapshot]:
+    """Um execute_script: serializa o DOM relevante e analisa em Python."""
+    try:
+        page = get_page(driver)
+        if page is not None:
+            html = page.lib("snapshot", REF_ATTR) or ""
+        else:
+            html = jscall(driver, "snapshot", REF_ATTR) or ""
+    except Exception as e:
+        logger.info(f"snapshot do DOM indisponível: {e}")
+        return None
+    snap = analyze_html(html)
+    logger.info(
+        f"📸 snapshot {snap.size / 1024:.0f}KB: curtir={len(snap.like_refs)} "
+        f"descurtir={len(snap.unlike_refs)} textareas={len(snap.textareas)} "
+        f"botões={len(snap.post_buttons)} avisos={len(snap.notices)}"
+    )
+    return snap
+
+
+def click_ref(driver: WebDriver, ref: str) -> bool:
+    page = get_page(driver)
+    if page is not None:
+        try:
+            if page.click_ref(REF_ATTR, ref):
+                return True
+        except Exception as e:
+            logger.info(f"clique CDP ref={ref} falhou ({e}); usando JS.")
+    try:
+        return bool(jscall(driver, "clickRef", REF_ATTR, ref))
+    except Exception as e:
+        logger.warning(f"Falha ao clicar ref={ref}: {e}")
+        return False
+
+
+def locate(driver: WebDriver, ref: str):
+    """WebElement do snapshot (para digitação), pelo localizador preciso."""
+    try:
+        return driver.find_element(By.CSS_SELECTOR, f'[{REF_ATTR}="{ref}"]')
+    except Exception:
+        return None
@@ -4,12 +4,16 @@ from __future__ import annotations
 import os
 import time
 from pathlib import Path
-from typing import Optional, Tuple, Any, Dict
+from typing import Optional, Tuple, Any, Dict, List
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 
+from utils import cdp_backend, metrics
+from utils.jslib import install as install_jslib
+from utils.logger import interruptible_sleep
+
 
 def _build_chrome_options(
     *,
@@ -74,6 +78,15 @@ def _build_chrome_options(
         merged_prefs.update(prefs)
     opts.add_experimental_option("prefs", merged_prefs)
 
+    # Limita o cache em disco do perfil (0 = sem limite explícito)
+    try:
+        cache_mb = int(os.getenv("CHROME_DISK_CACHE_MB", "64").strip())
+    except Exception:
+        cache_mb = 64
+    if cache_mb > 0:
+        opts.add_argument(f"--disk-cache-size={cache_mb * 1024 * 1024}")
+        opts.add_argument(f"--media-cache-size={cache_mb * 1024 * 1024}")
+
     chrome_binary = os.getenv("CHROME_BINARY", "").strip()
     if chrome_binary:
         opts.binary_location = chrome_binary
@@ -165,13 +178,44 @@ def init_driver(
     # stealth básico + permissão de geolocalização para IG
     _apply_stealth_cdp(driver)
     _grant_geolocation_for_instagram(driver)
+    try:
+        install_jslib(driver)
+    except Exception:
+        pass  # instalada sob demanda na primeira chamada
 
+    _instrument_driver(driver)
     return driver
 
 
+def _instrument_driver(driver: webdriver.Chrome) -> None:
+    """Conta e cronometra cada comando WebDriver (métricas por comando)."""
+    orig = driver.execute
+
+    def _execute(driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return orig(driver_command, params)
+        except Exception:
+            metrics.inc("webdriver_errors_total", command=driver_command)
+            raise
+        finally:
+            metrics.inc("webdriver_calls_total", command=driver_command)
+            metrics.observe(
+                "webdriver_call_seconds",
+                time.perf_counter() - start,
+                command=driver_command,
+            )
+
+    driver.execute = _execute
+
+
 def close_driver(driver: Optional[webdriver.Chrome], *, timeout: float = 3.0) -> None:
     if driver is None:
         return
+    try:
+        cdp_backend.release(driver)
+    except Exception:
+        pass
     try:
         driver.quit()
     except Exception:
@@ -218,7 +262,298 @@ def wait_for_page_ready(driver: webdriver.Chrome, timeout: float = 10.0) -> bool
                     return True
             except Exception:
                 pass
-            time.sleep(0.25)
+            if not interruptible_sleep(0.25):
+                break
     except Exception:
         pass
     return False
+
+
+# ------------- Navegação SPA (roteamento client-side) -------------
+_SPA_NAV_JS = """
+const url = arguments[0], readySel = arguments[1];
+let u;
+try { u = new URL(url, location.href); } catch (e) { return 'bad-url'; }
+if (u.origin !== location.origin) return 'cross-origin';
+const path = u.pathname + u.search;
+if (location.pathname + location.search === path) return 'same';
+// marca o conteúdo atual para não confundir a página anterior com a nova
+document.querySelectorAll(readySel).forEach(el => el.setAttribute('data-igpy-stale', '1'));
+const norm = p => p.replace(/\\/+$/, '');
+const link = Array.from(document.querySelectorAll('a[href]')).find(a => {
+  try {
+    const h = new URL(a.href, location.href);
+    return h.origin === u.origin && norm(h.pathname) === norm(u.pathname);
+  } catch (e) { return false; }
+});
+if (link) { link.click(); return 'link'; }
+history.pushState({}, '', path);
+window.dispatchEvent(new PopStateEvent('popstate', { state: {} }));
+return 'history';
+"""
+
+_SPA_READY_JS = """
+const path = arguments[0], readySel = arguments[1];
+const norm = p => p.replace(/\\/+$/, '');
+if (norm(location.pathname) !== norm(path)) return false;
+return Array.from(document.querySelectorAll(readySel))
+  .some(el => !el.hasAttribute('data-igpy-stale'));
+"""
+
+
+def navigate_spa(
+    driver: webdriver.Chrome,
+    url: str,
+    *,
+    ready_selector: str = "article, main",
+    timeout: float = 6.0,
+) -> Optional[str]:
+    """
+    Navega dentro da aplicação já carregada (sem recarregar bundle/app shell):
+    clica num link existente para o destino ou usa history.pushState + popstate.
+    Retorna o método usado ('link', 'history', 'same') ou None se não confirmou
+    a renderização da nova rota — nesse caso o chamador deve cair para driver.get.
+    """
+    try:
+        method = driver.execute_script(_SPA_NAV_JS, url, ready_selector)
+    except Exception:
+        return None
+    if method == "same":
+        return method
+    if method not in ("link", "history"):
+        return None
+
+    from urllib.parse import urlsplit
+
+    path = urlsplit(url).path or "/"
+    end = time.time() + float(timeout)
+    while time.time() < end:
+        try:
+            if driver.execute_script(_SPA_READY_JS, path, ready_selector):
+                return method
+        except Exception:
+            pass
+        if not interruptible_sleep(0.1):
+            break
+    return None
+
+
+def same_page(a: str, b: str) -> bool:
+    """Compara URLs ignorando query, fragmento e barra final."""
+
+    def norm(u: str) -> str:
+        return u.split("#", 1)[0].split("?", 1)[0].rstrip("/")
+
+    return norm(a) == norm(b)
+
+
+def navigate(
+    driver: webdriver.Chrome,
+    url: str,
+    *,
+    mode: str = "full",
+    ready_selector: str = "article, main",
+    spa_timeout: float = 6.0,
+    page_timeout: float = 12.0,
+    cdp_timeout: float = 30.0,
+) -> str:
+    """
+    Navega até `url` no modo pedido ('full' = driver.get, 'spa' = roteamento
+    in-app com fallback para driver.get). Retorna o modo efetivamente usado:
+    'spa:<método>', 'full', 'cdp' (DRIVER_BACKEND=cdp no lugar de driver.get)
+    ou 'already' (a aba já está no destino, ex.: pré-carregada). Exceções de
+    driver.get são propagadas.
+    """
+    try:
+        current = driver.current_url or ""
+    except Exception:
+        current = ""
+    if current and same_page(current, url):
+        wait_for_page_ready(driver, timeout=page_timeout)
+        return "already"
+    if mode == "spa":
+        if current.startswith(("http://", "https://")):
+            method = navigate_spa(
+                driver, url, ready_selector=ready_selector, timeout=spa_timeout
+            )
+            if method:
+                return f"spa:{method}"
+    if _navigate_cdp(driver, url, ready_selector, cdp_timeout, page_timeout):
+        return "cdp"
+    driver.get(url)
+    wait_for_page_ready(driver, timeout=page_timeout)
+    return "full"
+
+
+def _navigate_cdp(
+    driver: webdriver.Chrome,
+    url: str,
+    ready_selector: str,
+    timeout: float,
+    ready_timeout: float,
+) -> bool:
+    """
+    Page.navigate + loadEventFired pelo backend CDP e espera `ready_selector`
+    aparecer. False = backend desligado/falhou; o chamador usa driver.get.
+    """
+    page = cdp_backend.get_page(driver)
+    if page is None:
+        return False
+    try:
+        page.navigate(url, timeout=timeout)
+    except Exception:
+        return False
+    end = time.time() + float(ready_timeout)
+    while time.time() < end:
+        try:
+            if page.lib("anyOf", [ready_selector]):
+                break
+        except Exception:
+            pass
+        if not interruptible_sleep(0.1):
+            break
+    return True
+
+
+# ------------- Processos do browser (RSS/CPU) -------------
+try:  # dependência opcional; sem ela usamos /proc (Linux)
+    import psutil  # type: ignore
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+def _proc_children_map() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", "replace")
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        except Exception:
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def browser_pids(driver: webdriver.Chrome) -> List[int]:
+    """PIDs do chromedriver e de todos os processos Chrome abaixo dele."""
+    try:
+        root = int(driver.service.process.pid)
+    except Exception:
+        return []
+    if psutil is not None:
+        try:
+            p = psutil.Process(root)
+            return [root] + [c.pid for c in p.children(recursive=True)]
+        except Exception:
+            return []
+    if not os.path.isdir("/proc"):
+        return []
+    tree = _proc_children_map()
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(tree.get(pid, []))
+    return pids
+
+
+def browser_rss_bytes(driver: webdriver.Chrome) -> Optional[int]:
+    """Soma do RSS de chromedriver + Chrome (None se indisponível)."""
+    pids = browser_pids(driver)
+    if not pids:
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            if psutil is not None:
+                total += psutil.Process(pid).memory_info().rss
+            else:
+                with open(f"/proc/{pid}/statm") as f:
+                    total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            continue
+    return total
+
+
+def browser_cpu_seconds(driver: webdriver.Chrome) -> Optional[float]:
+    """CPU (user+system) acumulada por chromedriver + Chrome, em segundos."""
+    pids = browser_pids(driver)
+    if not pids:
+        return None
+    total = 0.0
+    for pid in pids:
+        try:
+            if psutil is not None:
+                t = psutil.Process(pid).cpu_times()
+                total += t.user + t.system
+            else:
+                with open(f"/proc/{pid}/stat", "rb") as f:
+                    fields = (
+                        f.read().decode("utf-8", "replace").rsplit(")", 1)[1].split()
+                    )
+                total += (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except Exception:
+            continue
+    return total
+
+
+def recycle_tab(driver: webdriver.Chrome) -> bool:
+    """
+    Abre uma aba limpa e fecha todas as outras: o processo de renderização
+    antigo (heap JS, DOM acumulado) é descartado sem reiniciar o browser.
+    """
+    try:
+        old = list(driver.window_handles)
+        driver.switch_to.new_window("tab")
+        fresh = driver.current_window_handle
+        for h in old:
+            try:
+                driver.switch_to.window(h)
+                driver.close()
+            except Exception:
+                pass
+        driver.switch_to.window(fresh)
+        set_main_handle(driver, fresh)
+        return True
+    except Exception:
+        return False
+
+
+# ------------- Aba principal / abas em segundo plano -------------
+# session_id -> handle da aba onde as ações acontecem. Quem troca a aba
+# principal (pré-carregamento, reciclagem) registra aqui; quem usa abas
+# auxiliares (coleta por tag) devolve o foco para ela.
+_MAIN_HANDLES: Dict[str, str] = {}
+
+
+def set_main_handle(driver: webdriver.Chrome, handle: str) -> None:
+    _MAIN_HANDLES[str(getattr(driver, "session_id", ""))] = handle
+
+
+def get_main_handle(
+    driver: webdriver.Chrome, default: Optional[str] = None
+) -> Optional[str]:
+    return _MAIN_HANDLES.get(str(getattr(driver, "session_id", "")), default)
+
+
+def open_background_tab(driver: webdriver.Chrome, url: str) -> Optional[str]:
+    """
+    Abre `url` numa aba nova sem tirar o foco da atual e sem bloquear
+    (window.open; o Chrome carrega em segundo plano). Retorna o handle novo.
+    """
+    try:
+        before = set(driver.window_handles)
+        driver.execute_script("window.open(arguments[0], '_blank', 'noopener');", url)
+        end = time.time() + 3.0
+        while time.time() < end:
+            new = [h for h in driver.window_handles if h not in before]
+            if new:
+                return new[0]
+            if not interruptible_sleep(0.05):
+                break
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,124 @@
+# utils/jslib.py
+from __future__ import annotations
+
+import os
+from typing import Any, Set, Tuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils.logger import get_logger
+
+logger = get_logger("driver")
+
+# Biblioteca JS do lado da página: instalada uma vez por documento (CDP
+# Page.addScriptToEvaluateOnNewDocument + avaliação no documento atual) e
+# chamada pelo nome com argumentos pequenos, em vez de reenviar e recompilar o
+# corpo das funções a cada execute_script. O namespace é não-enumerável.
+JS_NAMESPACE = os.getenv("JS_NAMESPACE", "__igpy")
+_VERSION = 2
+
+_LIB_JS = r"""
+(function (NS, V) {
+  if (window[NS] && window[NS].v === V) return;
+  var L = {
+    v: V,
+    q: function (css) { return document.querySelector(css); },
+    qa: function (css) { return Array.prototype.slice.call(document.querySelectorAll(css)); },
+    anyOf: function (sels) {
+      for (var i = 0; i < sels.length; i++) if (document.querySelector(sels[i])) return true;
+      return false;
+    },
+    up: function (el, n) {
+      while (el && n-- > 0) el = el.parentElement;
+      return el || null;
+    },
+    click: function (el) { el.click(); return true; },
+    focus: function (el) { el.focus(); return document.activeElement === el; },
+    isActive: function (el) { return document.activeElement === el; },
+    hl: function (el, c) {
+      el.scrollIntoView({block: 'center', inline: 'center'});
+      el.style.outline = '3px solid ' + c;
+      el.style.outlineOffset = '2px';
+      return true;
+    },
+    describe: function (el) {
+      var r = el.getBoundingClientRect();
+      return el.tagName.toLowerCase() + " aria='" + el.getAttribute('aria-label') + "'" +
+        ' w=' + (el.getAttribute('width') || '-') + ' h=' + (el.getAttribute('height') || '-') +
+        ' bx=' + r.left.toFixed(0) + ',' + r.top.toFixed(0) + ',' +
+        r.width.toFixed(0) + 'x' + r.height.toFixed(0);
+    },
+    // Numera (de forma estável no documento) os nós que interessam às decisões
+    // e devolve o HTML de <main> + overlays fora dele (ver utils/domsnap.py).
+    snapshot: function (attr) {
+      var sel = "svg[aria-label], textarea, div[role='button'], button[type='submit'], " +
+                "[role='dialog'], [role='alert'], [role='status'], [aria-live]";
+      var n = L._seq || 0;
+      document.querySelectorAll(sel).forEach(function (e) {
+        if (!e.hasAttribute(attr)) e.setAttribute(attr, String(++n));
+      });
+      L._seq = n;
+      var root = document.querySelector('main') || document.body;
+      var parts = [root.outerHTML];
+      document.querySelectorAll("[role='dialog'], [role='alert'], [role='status'], [aria-live]")
+        .forEach(function (e) { if (!root.contains(e)) parts.push(e.outerHTML); });
+      return parts.join('\n');
+    },
+    hrefs: function (css) {
+      return Array.prototype.map.call(document.querySelectorAll(css), function (a) { return a.href; });
+    },
+    // Clique pela ref: no ícone e, se ele não reagir, no botão que o envolve.
+    clickRef: function (attr, ref) {
+      var el = document.querySelector('[' + attr + '="' + ref + '"]');
+      if (!el) return false;
+      el.scrollIntoView({block: 'center', inline: 'center'});
+      (el.closest("[role='button'], button") || el).click();
+      return true;
+    }
+  };
+  L._seq = (window[NS] && window[NS]._seq) || 0;
+  Object.defineProperty(window, NS, {value: L, configurable: true, enumerable: false});
+})(%(ns)r, %(v)d);
+"""
+
+# Único script enviado por chamada: resolve a função pelo nome.
+_CALL_JS = (
+    "var L = window[arguments[0]];"
+    "if (!L) return {__igpy_missing__: 1};"
+    "return L[arguments[1]].apply(L, Array.prototype.slice.call(arguments, 2));"
+)
+
+_REGISTERED: Set[Tuple[str, str]] = set()  # (session_id, handle) com CDP ativo
+
+
+def source() -> str:
+    """Código da biblioteca (para instalar por outro canal, ex.: backend CDP)."""
+    return _LIB_JS % {"ns": JS_NAMESPACE, "v": _VERSION}
+
+
+def install(driver: WebDriver) -> None:
+    """Registra a biblioteca para os próximos documentos da aba e a avalia no atual."""
+    src = source()
+    try:
+        key = (str(driver.session_id), driver.current_window_handle)
+        if key not in _REGISTERED:
+            driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument", {"source": src}
+            )
+            _REGISTERED.add(key)
+    except Exception as e:
+        logger.info(f"jslib: registro por documento indisponível ({e})")
+    driver.execute_script(src)
+
+
+def call(driver: WebDriver, name: str, *args: Any) -> Any:
+    """
+    Chama window.<ns>.<name>(*args). Abas/documentos sem a biblioteca (aba
+    nova, about:blank) recebem a instalação sob demanda e a chamada é refeita.
+    Exceções JS propagam como no execute_script.
+    """
+    res = driver.execute_script(_CALL_JS, JS_NAMESPACE, name, *args)
+    if isinstance(res, dict) and res.get("__igpy_missing__"):
+        install(driver)
+        res = driver.execute_script(_CALL_JS, JS_NAMESPACE, name, *args)
+    return res
@@ -2,16 +2,20 @@
 from __future__ import annotations
 
 import os
+import re
 import sys
 import time
+import gzip
 import math
+import shutil
 import logging
 import threading
 from contextlib import contextmanager
-from logging.handlers import RotatingFileHandler
 from datetime import datetime, timezone
 from typing import Optional, Tuple
 
+from utils import metrics
+
 # ------------- Internals / Colors -------------
 _COLORS = {
     "RESET": "\033[0m",
@@ -77,6 +81,164 @@ class _FileFormatter(logging.Formatter):
         return f"{t} | {record.levelname:<7} | {record.name} | {thread} | {msg}"
 
 
+# ------------- Sink de arquivo único (compartilhado) -------------
+def _env_bool(key: str, default: bool = False) -> bool:
+    v = os.getenv(key)
+    if v is None:
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, str(default)).strip())
+    except Exception:
+        return default
+
+
+class _SharedFileSink(logging.FileHandler):
+    """
+    Um único arquivo/descritor para todos os loggers do processo.
+    Rotaciona por tamanho (LOG_MAX_MB) ou tempo (LOG_ROTATE_HOURS); o segmento
+    rotacionado vira <arquivo>.<AAAAmmdd-HHMMSS>[.gz], comprimido em thread de
+    fundo, e só os LOG_KEEP segmentos mais novos são mantidos.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_bytes: int,
+        interval_secs: float,
+        keep: int,
+        compress: bool,
+    ):
+        super().__init__(path, mode="a", encoding="utf-8", delay=False)
+        self.max_bytes = int(max_bytes)
+        self.interval_secs = float(interval_secs)
+        self.keep = int(keep)
+        self.compress = compress
+        self._next_rollover = self._compute_next(time.time())
+        # segmentos crus deixados por um processo anterior (gzip interrompido)
+        self._start_background(self._pending_segments())
+
+    def _compute_next(self, now: float) -> float:
+        if self.interval_secs <= 0:
+            return float("inf")
+        return now + self.interval_secs
+
+    def _segments(self):
+        d = os.path.dirname(self.baseFilename) or "."
+        prefix = os.path.basename(self.baseFilename) + "."
+        pat = re.compile(re.escape(prefix) + r"\d{8}-\d{6}(-\d+)?(\.gz)?$")
+        out = []
+        for name in os.listdir(d):
+            m = pat.match(name)
+            if m:
+                stamp = name[len(prefix) : len(prefix) + 15]
+                seq = int((m.group(1) or "-0")[1:])
+                out.append(((stamp, seq), os.path.join(d, name)))
+        return [p for _, p in sorted(out)]  # mais antigo primeiro
+
+    def _pending_segments(self):
+        if not self.compress:
+            return []
+        return [p for p in self._segments() if not p.endswith(".gz")]
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self._next_rollover:
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            try:
+                self.stream.seek(0, 2)
+                return self.stream.tell() >= self.max_bytes
+            except Exception:
+                return False
+        return False
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        dest = f"{self.baseFilename}.{stamp}"
+        n = 1
+        while os.path.exists(dest) or os.path.exists(dest + ".gz"):
+            dest = f"{self.baseFilename}.{stamp}-{n}"
+            n += 1
+        try:
+            if os.path.exists(self.baseFilename):
+                os.replace(self.baseFilename, dest)
+        except Exception:
+            dest = ""
+        self.stream = self._open()
+        self._next_rollover = self._compute_next(time.time())
+        self._start_background([dest] if dest and self.compress else [])
+
+    def _start_background(self, to_compress) -> None:
+        threading.Thread(
+            target=self._compress_and_prune,
+            args=(list(to_compress),),
+            daemon=True,
+            name="log-gzip",
+        ).start()
+
+    def _compress_and_prune(self, paths) -> None:
+        for src in paths:
+            tmp = src + ".gz.tmp"
+            try:
+                with open(src, "rb") as fi, gzip.open(tmp, "wb") as fo:
+                    shutil.copyfileobj(fi, fo, 1024 * 1024)
+                os.replace(tmp, src + ".gz")
+                os.remove(src)
+            except Exception:
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+        if self.keep > 0:
+            for old in self._segments()[: -self.keep]:
+                try:
+                    os.remove(old)
+                except Exception:
+                    pass
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # handle() já segura self.lock: rotação e escrita são atômicas entre threads
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+
+_FILE_SINK: Optional[logging.Handler] = None
+_FILE_SINK_LOCK = threading.Lock()
+
+
+def _file_sink(level: int) -> Optional[logging.Handler]:
+    """Cria (uma vez por processo) o sink de arquivo, se LOG_TO_FILE."""
+    global _FILE_SINK
+    if not _env_bool("LOG_TO_FILE", False):
+        return None
+    with _FILE_SINK_LOCK:
+        if _FILE_SINK is None:
+            log_file = os.getenv("LOG_FILE", "logs/app.log")
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            fh = _SharedFileSink(
+                log_file,
+                max_bytes=int(_env_float("LOG_MAX_MB", 20.0) * 1024 * 1024),
+                interval_secs=_env_float("LOG_ROTATE_HOURS", 24.0) * 3600.0,
+                keep=int(_env_float("LOG_KEEP", 10)),
+                compress=_env_bool("LOG_COMPRESS", True),
+            )
+            fh.setLevel(level)
+            fh.setFormatter(_FileFormatter())
+            _FILE_SINK = fh
+        return _FILE_SINK
+
+
 # ------------- Public: get_logger -------------
 _LOGGERS_CACHE = {}
 
@@ -100,27 +262,33 @@ def get_logger(name: str = "app") -> logging.Logger:
         ch.setFormatter(_ConsoleFormatter())
         logger.addHandler(ch)
 
-        # Arquivo (opcional)
-        if os.getenv("LOG_TO_FILE", "false").strip().lower() in (
-            "1",
-            "true",
-            "yes",
-            "y",
-            "on",
-        ):
-            log_file = os.getenv("LOG_FILE", "logs/app.log")
-            os.makedirs(os.path.dirname(log_file), exist_ok=True)
-            fh = RotatingFileHandler(
-                log_file, maxBytes=2 * 1024 * 1024, backupCount=3, encoding="utf-8"
-            )
-            fh.setLevel(level)
-            fh.setFormatter(_FileFormatter())
+        # Arquivo (opcional): um sink único compartilhado por todos os loggers
+        fh = _file_sink(level)
+        if fh is not None:
             logger.addHandler(fh)
 
     _LOGGERS_CACHE[name] = logger
     return logger
 
 
+# ------------- Public: Stop token (cancelamento cooperativo) -------------
+# Compartilhado por todos os módulos: o orquestrador o aciona em SIGINT/SIGTERM
+# e toda espera do bot acorda imediatamente.
+STOP_EVENT = threading.Event()
+
+
+def stop_requested() -> bool:
+    return STOP_EVENT.is_set()
+
+
+def interruptible_sleep(seconds: float) -> bool:
+    """
+    Aguarda até `seconds` ou até o stop ser pedido.
+    Retorna True se esperou o tempo todo, False se foi interrompida.
+    """
+    return not STOP_EVENT.wait(max(0.0, float(seconds)))
+
+
 # ------------- Public: Sleep with logging -------------
 def _fmt_secs(s: float) -> str:
     ms = int(round((s - int(s)) * 1000))
@@ -148,7 +316,8 @@ def human_sleep(
     duration = random.uniform(a, b)
     label = f"antes de {reason}" if reason else "antes da próxima etapa"
     log.info(f"⏳ aguardando {duration:0.2f}s ({a:0.2f}–{b:0.2f}) {label}")
-    time.sleep(duration)
+    if not interruptible_sleep(duration):
+        log.info(f"⏹️ espera interrompida por pedido de parada ({label})")
     return duration
 
 
@@ -168,6 +337,7 @@ def timeit(logger: Optional[logging.Logger], label: str):
     finally:
         dur = time.perf_counter() - start
         log.info(f"⏱️ {label} concluído em {dur:.3f}s")
+        metrics.observe("phase_seconds", dur, phase=label)
 
 
 # ------------- Public: Action logging helpers -------------
@@ -0,0 +1,167 @@
+# utils/metrics.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+# Registro em memória, thread-safe, de contadores, gauges e resumos (latências).
+# Chave = (nome, labels ordenados) — o mesmo modelo do formato Prometheus.
+_LOCK = threading.Lock()
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+_COUNTERS: Dict[_Key, float] = {}
+_GAUGES: Dict[_Key, float] = {}
+_SUMMARIES: Dict[_Key, Dict] = {}
+_SUMMARY_WINDOW = 512  # últimas N observações mantidas para quantis
+
+STARTED_AT = time.time()
+
+
+def _key(name: str, labels: Dict[str, object]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    k = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[k] = _COUNTERS.get(k, 0.0) + float(value)
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _LOCK:
+        _GAUGES[_key(name, labels)] = float(value)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    k = _key(name, labels)
+    with _LOCK:
+        s = _SUMMARIES.get(k)
+        if s is None:
+            s = _SUMMARIES[k] = {"count": 0, "sum": 0.0, "recent": []}
+        s["count"] += 1
+        s["sum"] += float(value)
+        recent: List[float] = s["recent"]
+        recent.append(float(value))
+        if len(recent) > _SUMMARY_WINDOW:
+            del recent[: len(recent) - _SUMMARY_WINDOW]
+
+
+def _quantile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+def snapshot() -> Dict[str, List[Dict]]:
+    """Cópia consistente do registro (para logs, JSON ou exposição HTTP)."""
+    with _LOCK:
+        counters = [
+            {"name": n, "labels": dict(l), "value": v}
+            for (n, l), v in _COUNTERS.items()
+        ]
+        gauges = [
+            {"name": n, "labels": dict(l), "value": v} for (n, l), v in _GAUGES.items()
+        ]
+        summaries = []
+        for (n, l), s in _SUMMARIES.items():
+            vals = sorted(s["recent"])
+            summaries.append(
+                {
+                    "name": n,
+                    "labels": dict(l),
+                    "count": s["count"],
+                    "sum": s["sum"],
+                    "quantiles": {
+                        "0.5": _quantile(vals, 0.5),
+                        "0.9": _quantile(vals, 0.9),
+                        "0.95": _quantile(vals, 0.95),
+                        "0.99": _quantile(vals, 0.99),
+                    },
+                }
+            )
+    return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+
+# ---------- Exposição (Prometheus texto / JSON) ----------
+_PREFIX = "igpy_"
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _series(name: str, labels: Dict[str, str]) -> str:
+    name = _PREFIX + "".join(c if c.isalnum() or c == "_" else "_" for c in name)
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{_esc(str(v))}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+def render_prometheus() -> str:
+    """Registro atual no formato de exposição texto do Prometheus (0.0.4)."""
+    snap = snapshot()
+    lines: List[str] = []
+    typed = set()
+
+    def _type(name: str, kind: str) -> None:
+        full = _series(name, {})
+        if full not in typed:
+            typed.add(full)
+            lines.append(f"# TYPE {full} {kind}")
+
+    for c in sorted(snap["counters"], key=lambda x: x["name"]):
+        _type(c["name"], "counter")
+        lines.append(f"{_series(c['name'], c['labels'])} {c['value']:g}")
+    for g in sorted(snap["gauges"], key=lambda x: x["name"]):
+        _type(g["name"], "gauge")
+        lines.append(f"{_series(g['name'], g['labels'])} {g['value']:g}")
+    for s in sorted(snap["summaries"], key=lambda x: x["name"]):
+        _type(s["name"], "summary")
+        for q, v in s["quantiles"].items():
+            lines.append(f"{_series(s['name'], {**s['labels'], 'quantile': q})} {v:g}")
+        lines.append(f"{_series(s['name'] + '_sum', s['labels'])} {s['sum']:g}")
+        lines.append(f"{_series(s['name'] + '_count', s['labels'])} {s['count']}")
+    _type("uptime_seconds", "gauge")
+    lines.append(f"{_series('uptime_seconds', {})} {time.time() - STARTED_AT:.0f}")
+    return "\n".join(lines) + "\n"
+
+
+def serve(host: str = "127.0.0.1", port: int = 9464):
+    """
+    Sobe o endpoint HTTP em thread daemon: /metrics (Prometheus) e
+    /metrics.json. Retorna o servidor (chame .shutdown() para parar).
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802 (API do http.server)
+            path = self.path.split("?", 1)[0]
+            if path in ("/metrics", "/"):
+                body = render_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                snap = snapshot()
+                snap["uptime_seconds"] = round(time.time() - STARTED_AT, 1)
+                body = json.dumps(snap, ensure_ascii=False).encode("utf-8")
+                ctype = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):  # silencioso: scrapes a cada 15s
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), _Handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, daemon=True, name="metrics-http"
+    ).start()
+    return server
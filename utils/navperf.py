@@ -0,0 +1,177 @@
+# utils/navperf.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils import metrics
+from utils.logger import get_logger
+
+logger = get_logger("navperf")
+
+# NAV_PERF=true → cada navegação (post ou keyword) grava uma linha JSONL em
+# NAV_PERF_FILE (padrão logs/navperf.jsonl), chaveada pelo id do alvo:
+#  - Navigation Timing (só em navegação completa; em SPA o documento é o mesmo)
+#  - bytes transferidos pelos recursos desde o início da navegação
+#  - CDP Performance.getMetrics: nós, heap JS e durações de layout/estilo/script
+#    (delta em relação ao instante anterior à navegação)
+_CDP_KEYS = (
+    "Nodes",
+    "JSHeapUsedSize",
+    "LayoutCount",
+    "RecalcStyleCount",
+    "LayoutDuration",
+    "RecalcStyleDuration",
+    "ScriptDuration",
+    "TaskDuration",
+)
+_CUMULATIVE = {
+    "LayoutCount",
+    "RecalcStyleCount",
+    "LayoutDuration",
+    "RecalcStyleDuration",
+    "ScriptDuration",
+    "TaskDuration",
+}
+
+# Marca o instante anterior à navegação: numa rota SPA só contam os recursos
+# pedidos depois dele (o buffer do documento continua o mesmo).
+_BEGIN_JS = """
+try { performance.setResourceTimingBufferSize(5000); } catch (e) {}
+return performance.now();
+"""
+
+_COLLECT_JS = """
+var since = arguments[0] || 0;
+var out = {href: location.href, nav: null, resources: 0, transfer: 0, encoded: 0, decoded: 0};
+try {
+  var n = performance.getEntriesByType('navigation')[0];
+  if (n) {
+    out.nav = {
+      type: n.type, dns: n.domainLookupEnd - n.domainLookupStart,
+      connect: n.connectEnd - n.connectStart, ttfb: n.responseStart - n.requestStart,
+      response: n.responseEnd - n.responseStart,
+      dom_interactive: n.domInteractive, dcl: n.domContentLoadedEventEnd,
+      load: n.loadEventEnd, transfer: n.transferSize || 0,
+      encoded: n.encodedBodySize || 0, decoded: n.decodedBodySize || 0
+    };
+  }
+  var rs = performance.getEntriesByType('resource').filter(function (r) {
+    return r.startTime >= since;
+  });
+  out.resources = rs.length;
+  for (var i = 0; i < rs.length; i++) {
+    out.transfer += rs[i].transferSize || 0;
+    out.encoded += rs[i].encodedBodySize || 0;
+    out.decoded += rs[i].decodedBodySize || 0;
+  }
+} catch (e) {}
+return out;
+"""
+
+_WRITE_LOCK = threading.Lock()
+
+
+def _enabled() -> bool:
+    v = os.getenv("NAV_PERF")
+    return v is not None and v.strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def _cdp_metrics(driver: WebDriver) -> Dict[str, float]:
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        raw = driver.execute_cdp_cmd("Performance.getMetrics", {}) or {}
+        return {
+            m["name"]: float(m["value"])
+            for m in raw.get("metrics", [])
+            if m.get("name") in _CDP_KEYS
+        }
+    except Exception:
+        return {}
+
+
+class NavCapture:
+    """Início de uma captura: guarda o estado anterior à navegação."""
+
+    def __init__(self, driver: WebDriver, key: str, kind: str):
+        self.key = key
+        self.kind = kind
+        self.t0 = time.perf_counter()
+        self.mark = 0.0
+        try:
+            self.mark = float(driver.execute_script(_BEGIN_JS) or 0.0)
+        except Exception:
+            pass
+        self.before = _cdp_metrics(driver)
+
+    def finish(
+        self, driver: WebDriver, *, url: str, method: str = ""
+    ) -> Optional[Dict]:
+        nav_secs = time.perf_counter() - self.t0
+        # SPA: mesmo documento → só recursos após a marca; navegação completa
+        # (ou aba pré-carregada, 'already') → documento inteiro
+        same_doc = method.startswith("spa")
+        try:
+            page = (
+                driver.execute_script(_COLLECT_JS, self.mark if same_doc else 0) or {}
+            )
+        except Exception as e:
+            logger.info(f"navperf indisponível para {url}: {e}")
+            return None
+        after = _cdp_metrics(driver)
+        cdp: Dict[str, float] = {}
+        for k, v in after.items():
+            if k in _CUMULATIVE and same_doc and k in self.before:
+                cdp[k] = round(v - self.before[k], 4)
+            else:
+                cdp[k] = round(v, 4)
+        rec = {
+            "ts": round(time.time(), 3),
+            "key": self.key,
+            "kind": self.kind,
+            "url": url,
+            "method": method,
+            "nav_secs": round(nav_secs, 3),
+            # em SPA a entrada 'navigation' é do documento antigo: não vale
+            "timing": None if same_doc else page.get("nav"),
+            "resources": page.get("resources", 0),
+            "transfer_bytes": page.get("transfer", 0),
+            "encoded_bytes": page.get("encoded", 0),
+            "decoded_bytes": page.get("decoded", 0),
+            "cdp": cdp,
+        }
+        _append(rec)
+        metrics.observe("nav_transfer_bytes", rec["transfer_bytes"], kind=self.kind)
+        metrics.observe("nav_seconds", nav_secs, kind=self.kind, method=method or "?")
+        logger.info(
+            f"📊 navperf {self.kind} {self.key}: {nav_secs:.2f}s, "
+            f"{rec['transfer_bytes'] / 1024:.0f}KB em {rec['resources']} recursos, "
+            f"nós={cdp.get('Nodes', 0):.0f} script={cdp.get('ScriptDuration', 0):.2f}s"
+        )
+        return rec
+
+
+def _append(rec: Dict) -> None:
+    path = Path(os.getenv("NAV_PERF_FILE", "logs/navperf.jsonl"))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _WRITE_LOCK, path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.warning(f"Falha ao gravar navperf: {e}")
+
+
+def begin_capture(driver: WebDriver, key: str, kind: str) -> Optional[NavCapture]:
+    """Inicia a captura se NAV_PERF estiver ligado (None caso contrário)."""
+    if not _enabled():
+        return None
+    try:
+        return NavCapture(driver, key, kind)
+    except Exception:
+        return None
@@ -1,21 +1,38 @@
 # utils/orchestrator.py
 import os
+import inspect
 import signal
 import random
 import threading
 import time
 from collections import deque
 from pathlib import Path
-from typing import Dict, Iterator, Optional
+from typing import Dict, Iterator, Optional, Tuple
 
+from utils import metrics
 from utils.config import get_config
-from utils.driver import init_driver, close_driver
-from utils.auth import ensure_login
-from utils.collector import collect_for_tags, get_next_target
+from utils.driver import close_driver, recycle_tab
+from utils.auth import ensure_login, has_valid_session
+from utils.collector import (
+    collect_for_tags,
+    iter_collect_for_tags,
+    get_next_target,
+    close_tag_tabs,
+)
 from utils.action import do_like, do_comment
+from utils.scheduler import ActionScheduler
+from utils.supervisor import DriverSupervisor, is_dead_session_error
+from utils.watchdog import MemoryWatchdog
+from utils.parking import get_page_park, parked
+from utils.preload import TargetPreloader
+from utils.ramprofile import RamProfile
+from utils.blockstate import BlockState
+from utils.profiler import profile_phase, start_profiling, stop_profiling
 from utils.logger import (
+    STOP_EVENT,
     get_logger,
     human_sleep,
+    interruptible_sleep,
     log_action_plan,
     log_action_result,
     log_collect_summary,
@@ -27,7 +44,7 @@ from utils.logger import (
 logger = get_logger("orchestrator")
 cfg = get_config()
 
-STOP_EVENT = threading.Event()
+STOP_SIGNAL_TS: Optional[float] = None  # perf_counter do pedido de parada
 DRIVERS: Dict[str, any] = {}
 DRIVERS_LOCK = threading.Lock()
 
@@ -89,6 +106,97 @@ def _set_geolocation(driver):
         logger.warning(f"Falha ao aplicar geolocation via CDP: {e}")
 
 
+def _collection_size(
+    *,
+    cap: int,
+    now: float,
+    deadline_ts: float,
+    actions_done: int,
+    hourly_actions: deque,
+    hourly_soft_cap: int,
+    attempts: int,
+    action_secs: float,
+) -> int:
+    """
+    Dimensiona a coleta pelo número projetado de ações restantes, em vez de
+    sempre buscar `cap` links (o excedente vira scroll desperdiçado e link velho).
+
+    - ritmo: tempo restante / (pausa média + duração média da ação) → tentativas
+    - soft-cap horário e max_actions_per_profile limitam *sucessos*; viram
+      tentativas dividindo pela taxa de sucesso observada (suavizada).
+    """
+    remaining = max(0.0, deadline_ts - now)
+    avg_pause = sum(cfg.pause_between_actions) / 2.0
+    avg_action = (action_secs / attempts) if attempts else 25.0
+    by_pace = remaining / max(1.0, avg_pause + avg_action)
+
+    # prior de 80% de sucesso com peso de 5 tentativas
+    success_rate = (actions_done + 4.0) / (attempts + 5.0)
+    success_rate = min(1.0, max(0.2, success_rate))
+    by_cap = max(0, hourly_soft_cap - len(hourly_actions)) + hourly_soft_cap * (
+        max(0.0, remaining - 3600.0) / 3600.0
+    )
+    by_budget = max(0, cfg.max_actions_per_profile - actions_done)
+
+    projected = min(by_pace, by_cap / success_rate, by_budget / success_rate)
+    size = int(projected * 1.15) + 1  # folga para dedupe/alvos inválidos
+    return max(1, min(cap, size))
+
+
+def _prepend(first: dict, rest: Iterator[dict]) -> Iterator[dict]:
+    yield first
+    yield from rest
+
+
+def _open_collection(
+    driver,
+    *,
+    max_links: int,
+    session_dir: Path,
+    exclude_ids: set,
+    phase: str,
+) -> Tuple[Iterator[dict], Optional[int]]:
+    """
+    Abre uma rodada de coleta. Com COLLECT_STREAMING=true espera o primeiro
+    alvo e retorna o gerador (demais alvos chegam sob demanda; contagem
+    desconhecida = None, ou 0 se nada veio); senão coleta a
+    lista inteira, loga o resumo e retorna (iterador, quantidade).
+    """
+    if _env_bool("COLLECT_STREAMING", False):
+        logger.info(f"[default] coleta({phase}) em streaming: até {max_links} alvos")
+        stream = iter_collect_for_tags(
+            driver=driver,
+            tags=cfg.tags,
+            locations=cfg.locations,
+            max_links=max_links,
+            profile_dir=str(session_dir),
+            exclude_ids=exclude_ids,
+        )
+        # o gerador é preguiçoso: puxa o primeiro alvo aqui para que o timeit
+        # do chamador meça o tempo até o primeiro alvo, e não só a criação
+        first = next(stream, None)
+        if first is None:
+            return iter(()), 0
+        return _prepend(first, stream), None
+
+    logger.info(f"[default] coleta({phase}) iniciada: até {max_links} alvos")
+    collected = collect_for_tags(
+        driver=driver,
+        tags=cfg.tags,  # usa TODAS as tags do array
+        locations=cfg.locations,
+        max_links=max_links,
+        profile_dir=str(session_dir),
+    )
+    log_collect_summary(
+        logger,
+        "default",
+        cfg.tags or cfg.locations,
+        len(collected),
+        phase=phase,
+    )
+    return iter(collected), len(collected)
+
+
 def _profile_worker():
     user = os.getenv("IG_PROFILE", "").strip()
     pwd = os.getenv("IG_PASS", "").strip()
@@ -107,8 +215,31 @@ def _profile_worker():
     start_ts = time.time()
     deadline_ts = start_ts + (timebox_hours * 3600.0)
 
-    try:
-        driver = init_driver(
+    # Perfil do Chrome em tmpfs (opcional); arquivos do bot continuam em session_dir.
+    chrome_dir = str(session_dir)
+    ram_profile: Optional[RamProfile] = None
+    if _env_bool("RAM_PROFILE", False):
+        ram_profile = RamProfile(
+            str(session_dir),
+            ram_root=os.getenv("RAM_PROFILE_ROOT") or None,
+            sync_interval=_env_float("RAM_PROFILE_SYNC_SECS", 300.0),
+        )
+        try:
+            chrome_dir = ram_profile.start()
+        except Exception as e:
+            logger.warning(f"[default] Perfil em RAM indisponível ({e}); usando disco.")
+            ram_profile = None
+
+    def _register(drv) -> None:
+        with DRIVERS_LOCK:
+            if drv is None:
+                DRIVERS.pop("default", None)
+            else:
+                DRIVERS["default"] = drv
+
+    sup = DriverSupervisor(
+        name="default",
+        driver_kwargs=dict(
             headless=_env_bool("HEADLESS", False),
             window_size=(
                 _env_int("WINDOW_WIDTH", 1280),
@@ -116,19 +247,26 @@ def _profile_worker():
             ),
             lang=os.getenv("LANG", "pt-BR"),
             user_agent=os.getenv("USER_AGENT", None),
-            profile_dir=str(session_dir),
-        )
+            profile_dir=chrome_dir,
+        ),
+        username=user,
+        password=pwd,
+        session_dir=str(session_dir),
+        on_ready=_register,
+        max_restarts=_env_int("ORCH_MAX_RESTARTS", 5),
+    )
+    try:
+        driver = sup.start()
     except Exception as e:
         logger.exception("[default] Erro ao iniciar driver: %s", e)
+        if ram_profile is not None:
+            ram_profile.stop()
         return
 
-    with DRIVERS_LOCK:
-        DRIVERS["default"] = driver
-
     try:
         # Login / sessão
         try:
-            with timeit(logger, "default ensure_login"):
+            with timeit(logger, "default ensure_login"), profile_phase("login"):
                 ok = ensure_login(
                     driver=driver,
                     username=user,
@@ -152,6 +290,8 @@ def _profile_worker():
         except Exception:
             pass
         human_sleep((4.8, 6.2), reason="aguardar pós-login na Home", logger=logger)
+        if STOP_EVENT.is_set():
+            return
 
         # Aplicar geolocalização do config se habilitado (não conflita com auth)
         _set_geolocation(driver)
@@ -162,31 +302,112 @@ def _profile_worker():
             reason="profile start stagger",
             logger=logger,
         )
+        if STOP_EVENT.is_set():
+            return
+
+        actions_done = 0
+        attempts = 0  # ações executadas (sucesso ou falha)
+        action_secs = 0.0  # tempo total gasto dentro das ações
+        used_targets = set()
+
+        def _sized(cap: int) -> int:
+            size = _collection_size(
+                cap=cap,
+                now=time.time(),
+                deadline_ts=deadline_ts,
+                actions_done=actions_done,
+                hourly_actions=hourly_actions,
+                hourly_soft_cap=hourly_soft_cap,
+                attempts=attempts,
+                action_secs=action_secs,
+            )
+            logger.info(
+                f"[default] coleta dimensionada: {size} alvos (limite config={cap})"
+            )
+            return size
+
+        # Bloqueio persistido de uma execução anterior: espera antes da coleta
+        # inicial (que navega e rola keywords; links coletados agora estariam
+        # velhos quando o cooldown acabasse)
+        block_state = BlockState(str(session_dir))
+        block_left = block_state.remaining()
+        if block_left > 0 and not STOP_EVENT.is_set():
+            wait = min(block_left, max(0.0, deadline_ts - time.time()))
+            logger.info(
+                f"[default] 🧊 Conta em cooldown por bloqueio "
+                f"({block_left:.0f}s restantes); coleta inicial adiada."
+            )
+            metrics.set_gauge("cooldown_active", 1, profile="default", kind="block")
+            with parked(driver, wait):
+                interruptible_sleep(wait)
+            metrics.set_gauge("cooldown_active", 0, profile="default", kind="block")
 
         # Coleta inicial (tags/locations)
         try:
-            with timeit(logger, "default coleta_inicial"):
-                collected = collect_for_tags(
-                    driver=driver,
-                    tags=cfg.tags,  # usa TODAS as tags do array
-                    locations=cfg.locations,
-                    max_links=cfg.max_collected_links_startup,
-                    profile_dir=str(session_dir),
+            if STOP_EVENT.is_set() or time.time() >= deadline_ts:
+                raise InterruptedError("sem tempo para a coleta inicial")
+            with timeit(logger, "default coleta_inicial"), profile_phase("collection"):
+                collected_iter, collect_size = _open_collection(
+                    driver,
+                    max_links=_sized(cfg.max_collected_links_startup),
+                    session_dir=session_dir,
+                    exclude_ids=used_targets,
+                    phase="startup",
                 )
-            log_collect_summary(
-                logger,
-                "default",
-                cfg.tags or cfg.locations,
-                len(collected),
-                phase="startup",
-            )
+        except InterruptedError as e:
+            logger.info(f"[default] {e}; pulando coleta inicial.")
+            collected_iter, collect_size = iter(()), 0
         except Exception as e:
             logger.exception("[default] Falha na coleta inicial: %s", e)
-            collected = []
-
-        actions_done = 0
-        used_targets = set()
-        collected_iter: Iterator[dict] = iter(collected)
+            collected_iter, collect_size = iter(()), 0
+        collect_phase = "startup"
+        collect_taken = 0  # alvos entregues pela coleta corrente
+
+        # Plano de horários pré-calculado (ORCH_SCHEDULE=planned) ou ritmo reativo
+        schedule: Optional[ActionScheduler] = None
+        if os.getenv("ORCH_SCHEDULE", "reactive").strip().lower() == "planned":
+            schedule = ActionScheduler(
+                start_ts=time.time(),
+                deadline_ts=deadline_ts,
+                max_actions=cfg.max_actions_per_profile,
+                hourly_cap=hourly_soft_cap,
+                pause_range=cfg.pause_between_actions,
+                window_secs=hourly_window_secs,
+            )
+        timeline_path = session_dir / "schedule_timeline.json"
+
+        def _reset_stream() -> None:
+            # um gerador de coleta em streaming está preso ao driver/abas
+            # antigos; listas já coletadas seguem valendo.
+            nonlocal collected_iter, collect_phase, collect_taken, collect_size
+            if inspect.isgenerator(collected_iter):
+                collected_iter, collect_size = iter(()), 0
+                collect_phase = "startup"
+                collect_taken = 0
+
+        def _recover_driver(force: bool = False) -> bool:
+            """Reinicia o browser se a sessão morreu; mantém fila e contadores."""
+            nonlocal driver
+            if not force and sup.is_alive():
+                return True
+            if not sup.recover(force=force):
+                return False
+            driver = sup.driver
+            _set_geolocation(driver)
+            _reset_stream()
+            return True
+
+        preloader = TargetPreloader("default") if _env_bool("PRELOAD_NEXT") else None
+
+        watchdog: Optional[MemoryWatchdog] = None
+        if _env_bool("WATCHDOG", False):
+            watchdog = MemoryWatchdog(
+                name="default",
+                interval_secs=_env_float("WATCHDOG_INTERVAL_SECS", 300.0),
+                heap_mb=_env_float("WATCHDOG_HEAP_MB", 512.0),
+                rss_mb=_env_float("WATCHDOG_RSS_MB", 2048.0),
+                nodes=_env_int("WATCHDOG_NODES", 150000),
+            )
 
         while not STOP_EVENT.is_set() and actions_done < cfg.max_actions_per_profile:
             # ----- Checagem de timebox (6h por padrão) -----
@@ -198,12 +419,72 @@ def _profile_worker():
                 )
                 break
 
-            # ----- Soft-cap por hora (janela deslizante de 60min) -----
-            # Remove timestamps fora da janela de 1h
+            # ----- Revalidação periódica da sessão (cookie, em cache) -----
+            if has_valid_session(driver) is False:
+                logger.warning("[default] Cookie de sessão expirou — refazendo login.")
+                try:
+                    with profile_phase("login"):
+                        relogged = ensure_login(
+                            driver=driver,
+                            username=user,
+                            password=pwd,
+                            session_dir=str(session_dir),
+                        )
+                except Exception as e:
+                    logger.exception("[default] Erro no re-login: %s", e)
+                    relogged = False
+                if not relogged:
+                    logger.error(
+                        "[default] Sessão perdida e re-login falhou. Encerrando."
+                    )
+                    break
+
+            # ----- Estado exposto no endpoint de métricas -----
             while hourly_actions and (now - hourly_actions[0] > hourly_window_secs):
                 hourly_actions.popleft()
+            metrics.set_gauge("actions_done", actions_done, profile="default")
+            metrics.set_gauge(
+                "hourly_window_actions", len(hourly_actions), profile="default"
+            )
+            metrics.set_gauge("hourly_soft_cap", hourly_soft_cap, profile="default")
+            if collect_size is not None:
+                metrics.set_gauge(
+                    "target_queue_depth",
+                    max(0, collect_size - collect_taken),
+                    profile="default",
+                )
+            if schedule is not None:
+                metrics.set_gauge(
+                    "schedule_pending_slots", schedule.pending(), profile="default"
+                )
+            blk = block_state.snapshot()
+            metrics.set_gauge("block_level", blk["level"], profile="default")
+            metrics.set_gauge(
+                "block_cooldown_remaining_seconds",
+                blk["remaining_secs"],
+                profile="default",
+            )
 
-            if len(hourly_actions) >= hourly_soft_cap:
+            # ----- Bloqueio da conta em vigor: espera sem navegar -----
+            block_left = block_state.remaining()
+            if block_left > 0:
+                wait = min(block_left, max(0.0, deadline_ts - now))
+                logger.info(
+                    f"[default] 🧊 Conta em cooldown por bloqueio "
+                    f"({block_left:.0f}s restantes); aguardando sem navegar."
+                )
+                t0 = time.time()
+                metrics.set_gauge("cooldown_active", 1, profile="default", kind="block")
+                with parked(driver, wait):
+                    interruptible_sleep(wait)
+                metrics.set_gauge("cooldown_active", 0, profile="default", kind="block")
+                if schedule is not None:
+                    schedule.shift(time.time() - t0, "bloqueio")
+                continue
+
+            # ----- Soft-cap por hora (janela deslizante de 60min) -----
+            # (no modo planejado o próprio plano já respeita o soft-cap)
+            if schedule is None and len(hourly_actions) >= hourly_soft_cap:
                 # Cooldown humano para aliviar a taxa
                 cooldown_range = (300.0, 600.0)  # 5 a 10 minutos
                 logger.info(
@@ -211,8 +492,15 @@ def _profile_worker():
                     f"({len(hourly_actions)}/{hourly_soft_cap}). "
                     f"Cooldown por {int(cooldown_range[0])}-{int(cooldown_range[1])}s."
                 )
-                human_sleep(
-                    cooldown_range, reason="hourly soft-cap cooldown", logger=logger
+                metrics.set_gauge(
+                    "cooldown_active", 1, profile="default", kind="soft_cap"
+                )
+                with parked(driver, cooldown_range[0]):
+                    human_sleep(
+                        cooldown_range, reason="hourly soft-cap cooldown", logger=logger
+                    )
+                metrics.set_gauge(
+                    "cooldown_active", 0, profile="default", kind="soft_cap"
                 )
                 # Após cooldown, revalida timebox e continua o loop
                 continue
@@ -222,42 +510,45 @@ def _profile_worker():
             try:
                 # Próximo target não utilizado
                 while True:
-                    cand = get_next_target(collected_iter)
+                    with profile_phase("collection"):  # coleta em streaming
+                        cand = get_next_target(collected_iter)
                     if cand is None:
                         break
+                    collect_taken += 1
                     if cand.get("id") not in used_targets:
                         target = cand
                         break
 
                 # Recoleta incremental se esgotou
                 if target is None:
+                    if collect_phase == "incremental" and collect_taken == 0:
+                        logger.info("[default] Sem novos targets. Encerrando worker.")
+                        break
                     try:
-                        with timeit(logger, "default recolha_incremental"):
-                            more = collect_for_tags(
-                                driver=driver,
-                                tags=cfg.tags,
-                                locations=cfg.locations,
-                                max_links=cfg.fetch_batch_size,
-                                profile_dir=str(session_dir),
-                            )
-                        if more:
-                            collected_iter = iter(more)
-                            log_collect_summary(
-                                logger,
-                                "default",
-                                (cfg.tags or cfg.locations),
-                                len(more),
+                        with timeit(
+                            logger, "default recolha_incremental"
+                        ), profile_phase("collection"):
+                            more_iter, count = _open_collection(
+                                driver,
+                                max_links=_sized(cfg.fetch_batch_size),
+                                session_dir=session_dir,
+                                exclude_ids=used_targets,
                                 phase="incremental",
                             )
-                            # volta ao topo do while para pegar o novo target
-                            continue
-                        else:
+                        if count == 0:
                             logger.info(
                                 "[default] Sem novos targets. Encerrando worker."
                             )
                             break
+                        collected_iter, collect_size = more_iter, count
+                        collect_phase = "incremental"
+                        collect_taken = 0
+                        # volta ao topo do while para pegar o novo target
+                        continue
                     except Exception as e:
                         logger.exception("[default] Erro na recolha incremental: %s", e)
+                        if not sup.is_alive() and _recover_driver():
+                            continue
                         break
             except Exception as e:
                 logger.exception("[default] Erro obtendo próximo target: %s", e)
@@ -273,10 +564,41 @@ def _profile_worker():
             action = _weighted_choice(cfg.actions_distribution)
 
             log_action_plan(logger, "default", action, target_url)
-            log_wait_before_action(logger, "default", action, cfg.pause_between_actions)
+            if preloader is not None:
+                preloader.start(driver, target_url)
+            slot: Optional[int] = None
+            if schedule is not None:
+                due = schedule.next_due()
+                if due:
+                    metrics.set_gauge(
+                        "next_action_timestamp_seconds", due, profile="default"
+                    )
+                with parked(driver, (due - time.time()) if due else 0.0):
+                    slot = schedule.wait_next()
+                if slot is None:
+                    if not STOP_EVENT.is_set():
+                        logger.info("[default] Plano de ações esgotado. Encerrando.")
+                    break
+            else:
+                # estimativa: a pausa exata é sorteada dentro do helper
+                metrics.set_gauge(
+                    "next_action_timestamp_seconds",
+                    time.time() + sum(cfg.pause_between_actions) / 2.0,
+                    profile="default",
+                )
+                with parked(driver, min(cfg.pause_between_actions)):
+                    log_wait_before_action(
+                        logger, "default", action, cfg.pause_between_actions
+                    )
+            if STOP_EVENT.is_set():
+                break
+            if preloader is not None:
+                preloader.adopt(driver, target_url)
 
+            ok = False
+            action_start = time.perf_counter()
             try:
-                with timeit(logger, f"default {action}"):
+                with timeit(logger, f"default {action}"), profile_phase(action):
                     if action == "like":
                         ok = do_like(
                             driver=driver, target=target, profile_dir=str(session_dir)
@@ -307,7 +629,13 @@ def _profile_worker():
                         )
                         ok = False
 
-                log_action_result(logger, "default", action, ok)
+                log_action_result(
+                    logger,
+                    "default",
+                    action,
+                    ok,
+                    extra=f"origem={target.get('source', '')}",
+                )
                 if ok:
                     actions_done += 1
                     # registra timestamp desta ação concluída para a janela horária
@@ -315,23 +643,70 @@ def _profile_worker():
 
             except Exception as e:
                 logger.exception(f"[default] Erro executando '{action}': {e}")
+                if is_dead_session_error(e) and not _recover_driver():
+                    break
+            finally:
+                attempts += 1
+                action_secs += time.perf_counter() - action_start
+                metrics.inc(
+                    "actions_total",
+                    profile="default",
+                    action=action,
+                    result="ok" if ok else "fail",
+                )
+                if schedule is not None and slot is not None:
+                    schedule.record(slot, ok, note=action)
+                    schedule.export(timeline_path)
+
+            # falhas "silenciosas" (ex.: navegação que falhou) podem ser um
+            # browser morto: confere e reinicia antes de seguir
+            if not ok and not _recover_driver():
+                logger.error("[default] Driver irrecuperável. Encerrando worker.")
+                break
+
+            # ----- Ponto seguro entre ações: watchdog de memória -----
+            if watchdog is not None and not STOP_EVENT.is_set():
+                recycle = watchdog.check(driver)
+                if recycle == "tab":
+                    close_tag_tabs(driver)
+                    if recycle_tab(driver):
+                        _reset_stream()
+                        logger.info("[default] 🩺 aba reciclada.")
+                elif recycle == "browser":
+                    if not _recover_driver(force=True):
+                        logger.error("[default] Falha ao reciclar browser. Encerrando.")
+                        break
+                    logger.info("[default] 🩺 browser reciclado.")
 
         logger.info(
             f"[default] Finalizado. Ações realizadas: {actions_done} "
             f"(janela real: {(time.time()-start_ts)/3600:.2f}h)."
         )
+        park = get_page_park()
+        if park is not None and park.cpu_saved_per_hour() is not None:
+            logger.info(
+                f"[default] 🅿️ CPU economizada estacionando a aba: "
+                f"≈ {park.cpu_saved_per_hour():.0f} CPU-s por hora de execução."
+            )
+        if schedule is not None:
+            st = schedule.stats()
+            logger.info(
+                f"[default] Plano x real: {st['executed']}/{st['planned']} slots "
+                f"executados, {st['ok']} OK, desvio médio {st['avg_drift_secs']:.1f}s "
+                f"(timeline em {timeline_path})"
+            )
 
     finally:
-        with DRIVERS_LOCK:
-            drv = DRIVERS.pop("default", None)
-        try:
-            close_driver(drv)
-        except Exception:
-            pass
+        sup.close()
+        if ram_profile is not None:
+            ram_profile.stop()  # Chrome já fechado: sync final consistente
 
 
 def _handle_signal(signum, frame):
+    global STOP_SIGNAL_TS
     logger.info(f"Sinal {signum} recebido. Encerrando…")
+    if STOP_SIGNAL_TS is None:
+        STOP_SIGNAL_TS = time.perf_counter()
     STOP_EVENT.set()
 
 
@@ -341,6 +716,18 @@ signal.signal(signal.SIGTERM, _handle_signal)
 
 def run():
     logger.info("Iniciando orquestração")
+    start_profiling()
+    metrics_server = None
+    metrics_port = _env_int("METRICS_PORT", 0)
+    if metrics_port > 0:
+        host = os.getenv("METRICS_HOST", "127.0.0.1")
+        try:
+            metrics_server = metrics.serve(host, metrics_port)
+            logger.info(
+                f"📈 métricas em http://{host}:{metrics_port}/metrics (+ .json)"
+            )
+        except Exception as e:
+            logger.warning(f"Endpoint de métricas indisponível: {e}")
     t = threading.Thread(target=_profile_worker, daemon=True, name="worker-default")
     t.start()
     try:
@@ -351,6 +738,16 @@ def run():
     except KeyboardInterrupt:
         STOP_EVENT.set()
     finally:
+        # Dá ao worker a chance de sair pelas esperas interrompíveis antes de
+        # derrubar os drivers por baixo dele.
+        if STOP_EVENT.is_set() and t.is_alive():
+            t.join(timeout=_env_float("ORCH_SHUTDOWN_GRACE", 10.0))
+            if t.is_alive():
+                logger.warning("Worker não encerrou no prazo; forçando drivers.")
+        if STOP_SIGNAL_TS is not None:
+            logger.info(
+                f"Latência de encerramento: {time.perf_counter() - STOP_SIGNAL_TS:.3f}s"
+            )
         with DRIVERS_LOCK:
             for k, drv in list(DRIVERS.items()):
                 try:
@@ -359,4 +756,7 @@ def run():
                     pass
                 DRIVERS.pop(k, None)
         logger.info("Drivers encerrados.")
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        stop_profiling()
     logger.info("Encerrado")
@@ -0,0 +1,186 @@
+# utils/parking.py
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils import metrics
+from utils.driver import browser_cpu_seconds
+from utils.logger import get_logger
+
+logger = get_logger("orchestrator")
+
+
+class PagePark:
+    """
+    "Estaciona" a aba durante esperas longas (pausa entre ações, cooldowns):
+    - mode='freeze': CDP Page.setWebLifecycleState=frozen (timers, vídeos e
+      rede da página param) e volta a 'active' antes da próxima ação;
+    - mode='blank': troca a página por about:blank (a próxima ação navega de
+      qualquer forma até o alvo, então não há o que restaurar).
+    Se o freeze não for aceito pelo Chrome, cai para 'blank' — exceto com
+    keep_shell=True (NAV_MODE=spa): about:blank descarta o app carregado e toda
+    navegação seguinte viraria driver.get, então o estacionamento é desligado.
+
+    Para medir a economia, 1 a cada `control_every` esperas elegíveis fica
+    sem estacionar (amostra de controle); a CPU do Chrome por segundo de espera
+    nas duas situações dá a economia estimada por hora.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str = "default",
+        mode: str = "freeze",
+        min_secs: float = 60.0,
+        control_every: int = 10,
+        keep_shell: bool = False,
+    ):
+        self.name = name
+        self.mode = mode if mode in ("freeze", "blank") else "freeze"
+        self.keep_shell = bool(keep_shell)
+        if self.keep_shell and self.mode == "blank":
+            logger.warning(
+                f"[{self.name}] PARK_MODE=blank conflita com NAV_MODE=spa; usando freeze."
+            )
+            self.mode = "freeze"
+        self.disabled = False
+        self.min_secs = float(min_secs)
+        self.control_every = max(0, int(control_every))
+        self._eligible = 0
+        self._acc = {"parked": [0.0, 0.0], "control": [0.0, 0.0]}  # [cpu, secs]
+        self._started = time.time()
+
+    # ---------- estacionar / restaurar ----------
+    def _park(self, driver: WebDriver) -> Optional[str]:
+        if self.disabled:
+            return None
+        if self.mode == "freeze":
+            try:
+                driver.execute_cdp_cmd("Page.setWebLifecycleState", {"state": "frozen"})
+                return "freeze"
+            except Exception as e:
+                if self.keep_shell:
+                    logger.info(
+                        f"[{self.name}] freeze indisponível ({e}); com NAV_MODE=spa "
+                        "a aba não será estacionada."
+                    )
+                    self.disabled = True
+                    return None
+                logger.info(f"[{self.name}] freeze indisponível ({e}); usando blank.")
+                self.mode = "blank"
+        try:
+            driver.get("about:blank")
+            return "blank"
+        except Exception:
+            return None
+
+    def _unpark(self, driver: WebDriver, how: Optional[str]) -> None:
+        if how == "freeze":
+            try:
+                driver.execute_cdp_cmd("Page.setWebLifecycleState", {"state": "active"})
+            except Exception:
+                pass
+
+    @contextmanager
+    def during(self, driver: Optional[WebDriver], expected_secs: float):
+        """Envolve uma espera; estaciona a aba se ela for longa o bastante."""
+        if driver is None or expected_secs < self.min_secs:
+            yield
+            return
+        self._eligible += 1
+        control = bool(self.control_every) and self._eligible % self.control_every == 0
+        cpu0 = browser_cpu_seconds(driver)
+        t0 = time.time()
+        how = None if control else self._park(driver)
+        try:
+            yield
+        finally:
+            self._unpark(driver, how)
+            cpu1 = browser_cpu_seconds(driver)
+            secs = time.time() - t0
+            if cpu0 is not None and cpu1 is not None and secs > 0:
+                bucket = "control" if control else "parked"
+                self._acc[bucket][0] += max(0.0, cpu1 - cpu0)
+                self._acc[bucket][1] += secs
+                metrics.inc(
+                    "park_wait_seconds_total", secs, profile=self.name, kind=bucket
+                )
+                metrics.inc(
+                    "park_cpu_seconds_total",
+                    max(0.0, cpu1 - cpu0),
+                    profile=self.name,
+                    kind=bucket,
+                )
+            if how:
+                metrics.inc("page_parks_total", profile=self.name, mode=how)
+            self._report()
+
+    # ---------- economia ----------
+    def cpu_saved_per_hour(self) -> Optional[float]:
+        """CPU-segundos economizados por hora de relógio do run (estimativa)."""
+        pc, ps = self._acc["parked"]
+        cc, cs = self._acc["control"]
+        if ps <= 0 or cs <= 0:
+            return None
+        saved = (cc / cs - pc / ps) * ps
+        hours = max(1e-6, (time.time() - self._started) / 3600.0)
+        return saved / hours
+
+    def _report(self) -> None:
+        per_h = self.cpu_saved_per_hour()
+        if per_h is None:
+            return
+        metrics.set_gauge("park_cpu_saved_seconds_per_hour", per_h, profile=self.name)
+        pc, ps = self._acc["parked"]
+        cc, cs = self._acc["control"]
+        logger.info(
+            f"[{self.name}] 🅿️ CPU em espera: estacionada {pc / ps * 100:.1f}% vs "
+            f"controle {cc / cs * 100:.1f}% de um core → economia ≈ {per_h:.0f} CPU-s/h"
+        )
+
+
+# Singleton simples (mesmo padrão do get_config): orquestrador e ações
+# compartilham a mesma instância e, portanto, as mesmas estatísticas.
+_park_singleton: Optional[PagePark] = None
+_park_loaded = False
+
+
+def get_page_park() -> Optional[PagePark]:
+    """PagePark configurado por PARK_MODE (freeze|blank|off); None se desligado."""
+    global _park_singleton, _park_loaded
+    if not _park_loaded:
+        _park_loaded = True
+        mode = (os.getenv("PARK_MODE", "off") or "off").strip().lower()
+        if mode in ("freeze", "blank"):
+            try:
+                min_secs = float(os.getenv("PARK_MIN_SECS", "60").strip())
+            except Exception:
+                min_secs = 60.0
+            try:
+                control_every = int(os.getenv("PARK_CONTROL_EVERY", "10").strip())
+            except Exception:
+                control_every = 10
+            nav_mode = (os.getenv("NAV_MODE", "full") or "full").strip().lower()
+            _park_singleton = PagePark(
+                mode=mode,
+                min_secs=min_secs,
+                control_every=control_every,
+                keep_shell=nav_mode == "spa",
+            )
+    return _park_singleton
+
+
+@contextmanager
+def parked(driver: Optional[WebDriver], expected_secs: float):
+    """Atalho: estaciona via singleton se habilitado; senão não faz nada."""
+    park = get_page_park()
+    if park is None:
+        yield
+        return
+    with park.during(driver, expected_secs):
+        yield
@@ -0,0 +1,87 @@
+# utils/preload.py
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils import metrics
+from utils.driver import open_background_tab, set_main_handle, same_page
+from utils.logger import get_logger
+
+logger = get_logger("orchestrator")
+
+
+class TargetPreloader:
+    """
+    Durante a pausa antes de uma ação, abre o próximo alvo numa aba em segundo
+    plano; quando a ação dispara, essa aba vira a principal (a anterior é
+    fechada) e a ação começa numa página já renderizada.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self.url: Optional[str] = None
+        self.handle: Optional[str] = None
+        self._started = 0.0
+
+    def start(self, driver: WebDriver, url: str) -> bool:
+        self.discard(driver)
+        handle = open_background_tab(driver, url)
+        if not handle:
+            logger.info(f"[{self.name}] pré-carregamento indisponível para {url}")
+            return False
+        self.url, self.handle, self._started = url, handle, time.time()
+        logger.info(f"[{self.name}] 🛫 pré-carregando em segundo plano: {url}")
+        return True
+
+    def adopt(self, driver: WebDriver, url: str) -> bool:
+        """Troca para a aba pré-carregada se ela for deste alvo."""
+        if not self.handle or not same_page(self.url or "", url):
+            self.discard(driver)
+            return False
+        handle, self.handle, self.url = self.handle, None, None
+        try:
+            old = driver.current_window_handle
+            driver.switch_to.window(handle)
+            current = driver.current_url or ""
+            if not same_page(current, url):
+                # redirecionou (login/checkpoint) — melhor navegar do zero
+                logger.info(
+                    f"[{self.name}] aba pré-carregada em {current}; descartando."
+                )
+                driver.close()
+                driver.switch_to.window(old)
+                metrics.inc("preload_total", profile=self.name, result="mismatch")
+                return False
+            try:
+                driver.switch_to.window(old)
+                driver.close()
+            except Exception:
+                pass
+            driver.switch_to.window(handle)
+            set_main_handle(driver, handle)
+            metrics.inc("preload_total", profile=self.name, result="adopted")
+            logger.info(
+                f"[{self.name}] 🛬 usando aba pré-carregada "
+                f"(aberta há {time.time() - self._started:.1f}s)"
+            )
+            return True
+        except Exception as e:
+            logger.info(f"[{self.name}] falha ao adotar aba pré-carregada: {e}")
+            metrics.inc("preload_total", profile=self.name, result="error")
+            return False
+
+    def discard(self, driver: Optional[WebDriver]) -> None:
+        handle, self.handle, self.url = self.handle, None, None
+        if not handle or driver is None:
+            return
+        try:
+            current = driver.current_window_handle
+            if handle != current:
+                driver.switch_to.window(handle)
+                driver.close()
+                driver.switch_to.window(current)
+        except Exception:
+            pass
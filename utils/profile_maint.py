@@ -0,0 +1,154 @@
+# utils/profile_maint.py
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("profile")
+
+# Caches que o Chrome reconstrói sozinho. Cookies, Login Data, Local Storage,
+# IndexedDB, Preferences e Local State NUNCA entram aqui.
+_PROFILE_CACHE_DIRS = (
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "DawnCache",
+    "DawnGraphiteCache",
+    "DawnWebGPUCache",
+    "Media Cache",
+    "Service Worker/CacheStorage",
+    "Service Worker/ScriptCache",
+    "blob_storage",
+)
+_ROOT_CACHE_DIRS = (
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+    "component_crx_cache",
+    "extensions_crx_cache",
+    "Crashpad/reports",
+)
+
+
+def dir_size(path: Path) -> int:
+    total = 0
+    for root, _dirs, files in os.walk(path, onerror=lambda e: None):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def _fmt_mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f}MB"
+
+
+def _profile_subdirs(root: Path) -> List[Path]:
+    """'Default' e eventuais 'Profile N' dentro do user-data-dir."""
+    subs = [root / "Default"]
+    subs += sorted(p for p in root.glob("Profile *") if p.is_dir())
+    return [p for p in subs if p.is_dir()]
+
+
+def prunable_paths(profile_dir: str) -> List[Path]:
+    root = Path(profile_dir)
+    paths = [root / d for d in _ROOT_CACHE_DIRS]
+    for sub in _profile_subdirs(root):
+        paths += [sub / d for d in _PROFILE_CACHE_DIRS]
+    return [p for p in paths if p.exists()]
+
+
+def profile_in_use(profile_dir: str) -> bool:
+    """O Chrome cria SingletonLock (symlink) enquanto usa o perfil."""
+    lock = Path(profile_dir) / "SingletonLock"
+    return lock.exists() or lock.is_symlink()
+
+
+def prune_profile(profile_dir: str, *, dry_run: bool = False) -> Dict[str, int]:
+    """Remove os caches reconstruíveis; retorna {caminho: bytes liberados}."""
+    freed: Dict[str, int] = {}
+    for p in prunable_paths(profile_dir):
+        size = dir_size(p) if p.is_dir() else p.stat().st_size
+        freed[str(p)] = size
+        if dry_run:
+            continue
+        try:
+            if p.is_dir() and not p.is_symlink():
+                shutil.rmtree(p)
+            else:
+                p.unlink()
+        except Exception as e:
+            logger.warning(f"Falha ao remover {p}: {e}")
+            freed[str(p)] = 0
+    return freed
+
+
+def measure_browser_start(profile_dir: str, runs: int = 1) -> Optional[float]:
+    """Tempo médio (s) de init_driver + close_driver com este perfil (headless)."""
+    from utils.driver import init_driver, close_driver
+
+    times = []
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        try:
+            drv = init_driver(headless=True, profile_dir=profile_dir)
+        except Exception as e:
+            logger.warning(f"Falha ao iniciar o browser para medir: {e}")
+            return None
+        times.append(time.perf_counter() - t0)
+        close_driver(drv)
+    return sum(times) / len(times)
+
+
+def run_maintenance(
+    profile_dir: str,
+    *,
+    dry_run: bool = False,
+    measure_start: bool = False,
+    force: bool = False,
+) -> int:
+    """Comando de manutenção: relata tamanho/início antes e depois da poda."""
+    root = Path(profile_dir)
+    if not root.is_dir():
+        logger.error(f"Perfil não encontrado: {root}")
+        return 2
+    if profile_in_use(profile_dir) and not force:
+        logger.error(
+            f"Perfil em uso (SingletonLock em {root}). Feche o bot/Chrome ou use --force."
+        )
+        return 3
+
+    # tamanhos antes de qualquer início medido: o start de referência regrava
+    # caches no perfil e inflaria o "antes" e o liberado
+    size_before = dir_size(root)
+    freed = prune_profile(profile_dir, dry_run=True)
+    start_before = measure_browser_start(profile_dir) if measure_start else None
+
+    removed = prune_profile(profile_dir, dry_run=dry_run)
+    if not dry_run:
+        # o que falhou ao remover não foi liberado
+        freed = {p: (n if removed.get(p, 0) else 0) for p, n in freed.items()}
+    for path, n in sorted(freed.items(), key=lambda kv: -kv[1]):
+        logger.info(f"  {'(dry-run) ' if dry_run else ''}{_fmt_mb(n):>9}  {path}")
+
+    size_after = dir_size(root)
+    start_after = measure_browser_start(profile_dir) if measure_start else None
+
+    logger.info(
+        f"Perfil {root}: {_fmt_mb(size_before)} → {_fmt_mb(size_after)} "
+        f"(liberado {_fmt_mb(sum(freed.values()))}{' previsto' if dry_run else ''})"
+    )
+    if start_before is not None and start_after is not None:
+        logger.info(
+            f"Início do browser: {start_before:.2f}s → {start_after:.2f}s "
+            f"({start_before - start_after:+.2f}s); o início 'antes' usa o perfil "
+            "sem poda e recria parte dos caches, removidos em seguida pela poda"
+        )
+    return 0
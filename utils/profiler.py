@@ -0,0 +1,169 @@
+# utils/profiler.py
+from __future__ import annotations
+
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger("profiler")
+
+# PROFILE_MODE=off|cprofile|sample|both
+#  - cprofile: um cProfile por fase (login, collection, like, comment), só na
+#    thread que executa a fase; sai em logs/profile-<ts>/<fase>.pstats
+#  - sample: thread amostradora lê a pilha das threads dentro de uma fase a
+#    cada PROFILE_INTERVAL_MS; sai em <fase>.collapsed (formato flamegraph)
+# Desligado, phase() devolve um nullcontext: custo de uma chamada de função.
+_NULL = nullcontext()
+
+
+def _mode() -> str:
+    m = (os.getenv("PROFILE_MODE", "off") or "off").strip().lower()
+    return m if m in ("cprofile", "sample", "both") else "off"
+
+
+class PhaseProfiler:
+    def __init__(self, mode: str, out_dir: Path, interval_secs: float = 0.01):
+        self.mode = mode
+        self.out_dir = out_dir
+        self.interval_secs = max(0.001, interval_secs)
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._active: Dict[int, List[str]] = {}  # thread ident → pilha de fases
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.samples = 0
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> None:
+        if self.mode in ("sample", "both"):
+            self._sampler = threading.Thread(
+                target=self._sample_loop, daemon=True, name="profiler-sampler"
+            )
+            self._sampler.start()
+        logger.info(f"🔬 profiling ativo (modo={self.mode}) → {self.out_dir}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=2.0)
+        self.dump()
+
+    # ---------- fases ----------
+    @contextmanager
+    def phase(self, name: str):
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._active.setdefault(ident, [])
+            outer = stack[-1] if stack else None
+            stack.append(name)
+        use_cprofile = self.mode in ("cprofile", "both")
+        # cProfile não aninha na mesma thread: a fase interna recebe o tempo
+        if use_cprofile and outer is not None:
+            self._profiles[outer].disable()
+        prof = None
+        if use_cprofile:
+            prof = self._profiles.setdefault(name, cProfile.Profile())
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            with self._lock:
+                stack.pop()
+                if not stack:
+                    self._active.pop(ident, None)
+            if use_cprofile and outer is not None:
+                self._profiles[outer].enable()
+
+    # ---------- amostragem ----------
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval_secs):
+            with self._lock:
+                active = {k: v[-1] for k, v in self._active.items() if v}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, phase in active.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                parts: List[str] = []
+                while frame is not None:
+                    co = frame.f_code
+                    parts.append(f"{os.path.basename(co.co_filename)}:{co.co_name}")
+                    frame = frame.f_back
+                parts.append(phase)
+                key = ";".join(reversed(parts))
+                self._stacks.setdefault(phase, Counter())[key] += 1
+                self.samples += 1
+
+    # ---------- saída ----------
+    def dump(self) -> None:
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            for name, prof in list(self._profiles.items()):
+                prof.dump_stats(str(self.out_dir / f"{name}.pstats"))
+            total: Counter = Counter()
+            for name, stacks in list(self._stacks.items()):
+                total.update(stacks)
+                with (self.out_dir / f"{name}.collapsed").open(
+                    "w", encoding="utf-8"
+                ) as f:
+                    for key, n in stacks.most_common():
+                        f.write(f"{key} {n}\n")
+            if total:
+                with (self.out_dir / "all.collapsed").open("w", encoding="utf-8") as f:
+                    for key, n in total.most_common():
+                        f.write(f"{key} {n}\n")
+            logger.info(
+                f"🔬 profiling salvo em {self.out_dir} "
+                f"(fases={sorted(set(self._profiles) | set(self._stacks))}, "
+                f"amostras={self.samples})"
+            )
+        except Exception as e:
+            logger.warning(f"Falha ao salvar profiling: {e}")
+
+
+_PROFILER: Optional[PhaseProfiler] = None
+
+
+def start_profiling() -> Optional[PhaseProfiler]:
+    """Liga o profiler conforme PROFILE_MODE (no-op se desligado)."""
+    global _PROFILER
+    mode = _mode()
+    if mode == "off" or _PROFILER is not None:
+        return _PROFILER
+    base = Path(os.getenv("PROFILE_DIR", "logs"))
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    try:
+        interval = float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000.0
+    except Exception:
+        interval = 0.01
+    _PROFILER = PhaseProfiler(mode, base / f"profile-{stamp}", interval)
+    _PROFILER.start()
+    return _PROFILER
+
+
+def stop_profiling() -> None:
+    global _PROFILER
+    prof, _PROFILER = _PROFILER, None
+    if prof is not None:
+        prof.stop()
+
+
+def profile_phase(name: str):
+    """Context manager da fase `name`; nullcontext quando o profiling está off."""
+    prof = _PROFILER
+    if prof is None:
+        return _NULL
+    return prof.phase(name)
@@ -0,0 +1,308 @@
+# utils/ramprofile.py
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from utils.logger import get_logger
+from utils.profile_maint import prunable_paths
+
+logger = get_logger("profile")
+
+# O que precisa sobreviver entre execuções (relativo ao user-data-dir).
+# Caches e histórico ficam só na RAM.
+_SYNC_FILES = (
+    "Local State",
+    "Default/Preferences",
+    "Default/Secure Preferences",
+    "Default/Cookies",
+    "Default/Network/Cookies",
+    "Default/Login Data",
+    "Default/Web Data",
+)
+_SYNC_DIRS = (
+    "Default/Local Storage",
+    "Default/Session Storage",
+    "Default/IndexedDB",
+)
+_SQLITE_FILES = {
+    "Default/Cookies",
+    "Default/Network/Cookies",
+    "Default/Login Data",
+    "Default/Web Data",
+}
+_SKIP_NAMES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile"}
+
+_NEW = ".ramsync-new"
+_OLD = ".ramsync-old"
+_TMP = ".ramsync-tmp"
+
+
+def _fsync_file(p: Path) -> None:
+    try:
+        with open(p, "rb") as f:
+            os.fsync(f.fileno())
+    except Exception:
+        pass
+
+
+def _fsync_dir(p: Path) -> None:
+    try:
+        fd = os.open(str(p), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except Exception:
+        pass
+
+
+def recover_persisted(persist_dir: Path) -> None:
+    """
+    Conserta sobras de uma sincronização interrompida (crash no meio):
+    - X.ramsync-old sem X     → troca não terminou: restaura o antigo;
+    - X.ramsync-old com X     → troca terminou: apaga o antigo;
+    - X.ramsync-new / -tmp    → cópia incompleta: descarta.
+    """
+    if not persist_dir.is_dir():
+        return
+    for p in sorted(persist_dir.rglob("*"), key=lambda x: len(x.parts), reverse=True):
+        name = p.name
+        try:
+            if name.endswith(_OLD):
+                live = p.with_name(name[: -len(_OLD)])
+                if live.exists():
+                    shutil.rmtree(p) if p.is_dir() else p.unlink()
+                else:
+                    os.replace(p, live)
+                    logger.warning(f"🧯 restaurado após sync interrompido: {live}")
+            elif name.endswith(_NEW) or name.endswith(_TMP):
+                shutil.rmtree(p) if p.is_dir() else p.unlink()
+        except Exception as e:
+            logger.warning(f"Falha ao recuperar {p}: {e}")
+
+
+def _cleanup_stale_ram_dirs(ram_root: Path) -> None:
+    """Remove cópias em RAM de execuções que morreram (PID inexistente)."""
+    for d in ram_root.glob("igpy-profile-*"):
+        try:
+            pid = int(d.name.rsplit("-", 1)[1])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            shutil.rmtree(d, ignore_errors=True)
+            logger.info(f"🧹 cópia RAM órfã removida: {d}")
+        except Exception:
+            continue
+
+
+_SQLITE_SIDECARS = ("-journal", "-wal", "-shm")
+
+
+def _sidecars(p: Path):
+    return [p.with_name(p.name + suf) for suf in _SQLITE_SIDECARS]
+
+
+def _integrity_ok(p: Path) -> bool:
+    try:
+        c = sqlite3.connect(f"file:{p}?mode=ro", uri=True, timeout=2.0)
+        try:
+            row = c.execute("PRAGMA integrity_check").fetchone()
+        finally:
+            c.close()
+        return bool(row) and row[0] == "ok"
+    except Exception:
+        return False
+
+
+def _copy_sqlite(src: Path, dst: Path) -> bool:
+    """
+    Cópia autocontida (um arquivo só, sem journal) de um banco em uso.
+    Preferência: backup API (snapshot consistente). Se o Chrome segurar o lock,
+    cópia bruta do arquivo principal — aceita só sem journal/WAL vivo e com
+    `PRAGMA integrity_check` = ok. False = cópia rejeitada (dst removido).
+    """
+    for p in [dst, *_sidecars(dst)]:
+        if p.exists():
+            p.unlink()
+    try:
+        s = sqlite3.connect(f"file:{src}?mode=ro", uri=True, timeout=2.0)
+        try:
+            # segura o lock compartilhado antes: com o banco ocupado falha aqui
+            # (timeout), em vez de o backup() repetir SQLITE_BUSY para sempre
+            s.execute("BEGIN")
+            s.execute("SELECT count(*) FROM sqlite_master").fetchone()
+            d = sqlite3.connect(str(dst))
+            try:
+                s.backup(d)
+                d.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                d.close()
+        finally:
+            s.close()
+        ok = not any(p.exists() for p in _sidecars(dst))
+    except Exception:
+        ok = False
+        if dst.exists():
+            dst.unlink()
+        busy = any(p.exists() and p.stat().st_size > 0 for p in _sidecars(src))
+        if not busy:
+            shutil.copy2(src, dst)
+            ok = _integrity_ok(dst) and not any(p.exists() for p in _sidecars(dst))
+    if not ok:
+        for p in [dst, *_sidecars(dst)]:
+            if p.exists():
+                p.unlink()
+    return ok
+
+
+class RamProfile:
+    """
+    Perfil do Chrome em tmpfs com sincronização de volta para o disco
+    (sessions/ em storage de rede sofre com as milhares de escritas pequenas).
+
+    - start(): recupera sobras de sync interrompido, copia o perfil persistido
+      (sem caches) para a RAM e inicia a sincronização periódica;
+    - sync(): copia os arquivos importantes para o disco de forma atômica
+      (arquivo temporário + os.replace; diretórios via troca .ramsync-new/old),
+      então uma falha no meio nunca deixa a sessão persistida corrompida;
+      bancos SQLite só são trocados por uma cópia verificada;
+    - stop(): sincroniza uma última vez (chame com o Chrome já fechado) e
+      remove a cópia em RAM.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str,
+        *,
+        ram_root: Optional[str] = None,
+        sync_interval: float = 300.0,
+    ):
+        self.persist_dir = Path(persist_dir).resolve()
+        root = ram_root or ("/dev/shm" if os.path.isdir("/dev/shm") else None)
+        if root is None:
+            logger.warning(
+                "tmpfs (/dev/shm) indisponível; usando diretório temporário."
+            )
+            root = tempfile.gettempdir()
+        self.ram_root = Path(root)
+        self.ram_dir = self.ram_root / f"igpy-profile-{os.getpid()}"
+        self.sync_interval = float(sync_interval)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- ciclo de vida ----------
+    def start(self) -> str:
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        recover_persisted(self.persist_dir)
+        _cleanup_stale_ram_dirs(self.ram_root)
+        if self.ram_dir.exists():
+            shutil.rmtree(self.ram_dir, ignore_errors=True)
+
+        skip = {p.resolve() for p in prunable_paths(str(self.persist_dir))}
+
+        def _ignore(dirpath: str, names):
+            base = Path(dirpath).resolve()
+            return [n for n in names if n in _SKIP_NAMES or (base / n) in skip]
+
+        shutil.copytree(self.persist_dir, self.ram_dir, ignore=_ignore, symlinks=True)
+        logger.info(f"💾→🧠 perfil copiado para RAM: {self.ram_dir}")
+
+        if self.sync_interval > 0:
+            self._thread = threading.Thread(
+                target=self._loop, daemon=True, name="ramprofile-sync"
+            )
+            self._thread.start()
+        return str(self.ram_dir)
+
+    def _loop(self) -> None:
+        # LevelDB (Local/Session Storage, IndexedDB) não tem snapshot consistente
+        # com o Chrome escrevendo: durante a execução só os arquivos; os
+        # diretórios vão no sync final, com o browser fechado.
+        while not self._stop.wait(self.sync_interval):
+            self.sync(include_dirs=False)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30.0)
+        ok = self.sync()
+        if ok:
+            shutil.rmtree(self.ram_dir, ignore_errors=True)
+        else:
+            logger.warning(f"Sync final falhou; cópia em RAM mantida em {self.ram_dir}")
+
+    # ---------- sincronização ----------
+    def _sync_file(self, rel: str) -> bool:
+        src = self.ram_dir / rel
+        if not src.is_file():
+            return True
+        dst = self.persist_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(dst.name + _TMP)
+        if rel in _SQLITE_FILES:
+            if not _copy_sqlite(src, tmp):
+                # banco ocupado/inconsistente: mantém o persistido, tenta no próximo sync
+                logger.info(f"⏭️ {rel} em uso; cópia adiada para o próximo sync")
+                return False
+            # journal/WAL antigos aplicados sobre o banco novo o corromperiam:
+            # saem antes da troca (o tmp é autocontido)
+            for side in _sidecars(dst):
+                if side.exists():
+                    side.unlink()
+        else:
+            shutil.copy2(src, tmp)
+        _fsync_file(tmp)
+        os.replace(tmp, dst)
+        _fsync_dir(dst.parent)
+        return True
+
+    def _sync_dir(self, rel: str) -> None:
+        src = self.ram_dir / rel
+        if not src.is_dir():
+            return
+        dst = self.persist_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        new = dst.with_name(dst.name + _NEW)
+        old = dst.with_name(dst.name + _OLD)
+        if new.exists():
+            shutil.rmtree(new)
+        shutil.copytree(
+            src, new, ignore=lambda d, names: [n for n in names if n in _SKIP_NAMES]
+        )
+        _fsync_dir(new)
+        if dst.exists():
+            os.replace(dst, old)
+        os.replace(new, dst)
+        _fsync_dir(dst.parent)
+        if old.exists():
+            shutil.rmtree(old, ignore_errors=True)
+
+    def sync(self, include_dirs: bool = True) -> bool:
+        """
+        Sincroniza RAM → disco. Retorna False se algum item falhou ou foi adiado.
+        include_dirs=True só com o Chrome fechado (ver _loop).
+        """
+        with self._lock:
+            if not self.ram_dir.exists():
+                return False
+            ok = True
+            for rel in _SYNC_FILES:
+                try:
+                    ok = self._sync_file(rel) and ok
+                except Exception as e:
+                    ok = False
+                    logger.warning(f"Falha ao sincronizar {rel}: {e}")
+            for rel in _SYNC_DIRS if include_dirs else ():
+                try:
+                    self._sync_dir(rel)
+                except Exception as e:
+                    ok = False
+                    logger.warning(f"Falha ao sincronizar {rel}: {e}")
+            logger.info(f"🧠→💾 perfil sincronizado ({'ok' if ok else 'parcial'})")
+            return ok
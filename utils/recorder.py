@@ -0,0 +1,329 @@
+# utils/recorder.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from html import escape
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils.logger import get_logger
+
+logger = get_logger("recorder")
+
+# RECORD_FIXTURES=true → grava snapshots sanitizados do DOM real (grade de
+# keyword, post, diálogo de bloqueio, caixa de comentário) em
+# RECORD_FIXTURES_DIR (padrão bench/fixtures/recorded/<tipo>/), servidos
+# depois pelo stand-in de bench/server.py (--recorded).
+KINDS = ("keyword", "post", "block", "comment")
+
+_PIXEL = "data:image/gif;base64,R0lGODlhAQABAAAAACw="
+_RESERVED_PATHS = {
+    "p",
+    "reel",
+    "reels",
+    "explore",
+    "accounts",
+    "direct",
+    "stories",
+    "static",
+    "about",
+    "legal",
+    "developer",
+    "web",
+    "api",
+    "graphql",
+    "challenge",
+}
+_RE_PROFILE_HREF = re.compile(
+    r"^(?:https?://(?:www\.)?instagram\.com)?/([A-Za-z0-9._]{1,30})/?$"
+)
+_RE_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_RE_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_RE_IG_ORIGIN = re.compile(r"^https?://(?:www\.)?instagram\.com")
+# atributos que carregam tokens, ids de sessão ou dados do usuário
+_DROP_ATTRS = {"value", "nonce", "integrity", "data-testid", "srcset", "data-src"}
+# URLs: query e fragmento saem (igsh= de compartilhamento, fb_dtsg= de forms)
+_URL_ATTRS = {"href", "src", "action", "formaction", "srcset"}
+# texto livre (legenda, nome de exibição, local, comentários) fica mascarado
+_TEXT_ATTRS = {"alt", "title"}
+_TEXT_CONTAINERS = {"article", "header", "ul", "ol", "li", "h1", "h2", "figcaption"}
+_RE_WORD = re.compile(r"\w")
+_VOID = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+
+def _strip_url(v: str) -> str:
+    return v.split("#", 1)[0].split("?", 1)[0]
+
+
+def _mask(text: str) -> str:
+    """Marcador do mesmo tamanho (letras/dígitos → x; espaços e pontuação ficam)."""
+    return _RE_WORD.sub("x", text)
+
+
+class _Sanitizer(HTMLParser):
+    """
+    Reescreve o HTML removendo scripts, comentários, metas, valores de campos,
+    URLs assinadas do CDN e query/fragmento de toda URL; troca @handles,
+    e-mails e telefones por marcadores estáveis e mascara (mesmo tamanho) o
+    texto de posts, cabeçalhos e comentários — exceto o de botões, que as
+    heurísticas de ação leem. A estrutura e o volume do DOM são preservados.
+    """
+
+    def __init__(self, own_user: str = ""):
+        super().__init__(convert_charrefs=False)
+        self.out: List[str] = []
+        self._skip = 0  # dentro de <script>/<noscript>/<textarea>
+        # pilha de elementos abertos: (tag, é contêiner de texto, é botão)
+        self._stack: List[Tuple[str, bool, bool]] = []
+        self._containers = 0
+        self._controls = 0
+        self._handles: Dict[str, str] = {}
+        self._pattern: Optional[re.Pattern] = None
+        if own_user:
+            self._handles[own_user.lower()] = "usuario_teste"
+
+    def prescan(self, html: str) -> None:
+        """Descobre os @handles de todos os links de perfil antes de reescrever."""
+        for href in re.findall(r'href=["\']([^"\']+)["\']', html):
+            m = _RE_PROFILE_HREF.match(href)
+            if m and m.group(1).lower() not in _RESERVED_PATHS:
+                self._alias(m.group(1))
+
+    def _alias(self, handle: str) -> str:
+        key = handle.lower()
+        if key not in self._handles:
+            self._handles[key] = f"usuario_{len(self._handles) + 1}"
+            self._pattern = None
+        return self._handles[key]
+
+    def redact(self, text: str) -> str:
+        text = _RE_EMAIL.sub("email@exemplo.com", text)
+        text = _RE_PHONE.sub("000000000", text)
+        if not self._handles:
+            return text
+        if self._pattern is None:
+            alts = sorted(self._handles, key=len, reverse=True)
+            self._pattern = re.compile(
+                r"(?<![\w.])(" + "|".join(map(re.escape, alts)) + r")(?!\w)",
+                re.IGNORECASE,
+            )
+        return self._pattern.sub(lambda m: self._handles[m.group(1).lower()], text)
+
+    def _attrs(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        parts: List[str] = []
+        for k, v in attrs:
+            if k in _DROP_ATTRS or k.startswith("on") or k == "data-igpy-ref":
+                continue
+            if v is None:
+                parts.append(f" {k}")
+                continue
+            if k in _URL_ATTRS:
+                v = _strip_url(v)
+            if k == "src" and tag in ("img", "video", "source", "iframe"):
+                v = _PIXEL
+            elif k in _TEXT_ATTRS:
+                v = _mask(v)
+            elif k == "href":
+                m = _RE_PROFILE_HREF.match(v)
+                if m and m.group(1).lower() not in _RESERVED_PATHS:
+                    v = f"/{self._alias(m.group(1))}/"
+                else:
+                    v = _RE_IG_ORIGIN.sub("", v)
+            elif k == "style":
+                v = re.sub(r"url\([^)]*\)", "none", v)
+            v = self.redact(v)
+            parts.append(f' {k}="{escape(v, quote=True)}"')
+        return "".join(parts)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "noscript"):
+            self._skip += 1
+            return
+        if self._skip:
+            return
+        a = dict(attrs)
+        if tag == "meta" and "charset" not in a and a.get("name") != "viewport":
+            return  # metas carregam tokens (csrf, app ids)
+        if tag == "link":
+            return  # CSS/preloads do CDN não são servidos offline
+        self.out.append(f"<{tag}{self._attrs(tag, attrs)}>")
+        if tag == "textarea":
+            self._skip += 1  # conteúdo digitado não vai para a fixture
+            self.out.append("</textarea>")
+            return
+        if tag not in _VOID:
+            self._push(tag, a)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID and tag not in ("script", "noscript", "textarea"):
+            self._pop(tag)  # <x/> não abre escopo
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "noscript", "textarea"):
+            if self._skip:
+                self._skip -= 1
+            return
+        if self._skip or tag in _VOID:
+            return
+        self._pop(tag)
+        self.out.append(f"</{tag}>")
+
+    # ---------- escopo de texto ----------
+    def _push(self, tag: str, a: Dict[str, Optional[str]]) -> None:
+        container = tag in _TEXT_CONTAINERS
+        control = tag == "button" or a.get("role") == "button"
+        self._stack.append((tag, container, control))
+        self._containers += container
+        self._controls += control
+
+    def _pop(self, tag: str) -> None:
+        if not any(t == tag for t, _, _ in self._stack):
+            return  # fechamento órfão: não desmonta a pilha
+        while self._stack:
+            t, container, control = self._stack.pop()
+            self._containers -= container
+            self._controls -= control
+            if t == tag:
+                break
+
+    def _masking(self) -> bool:
+        return self._containers > 0 and self._controls == 0
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        self.out.append(_mask(data) if self._masking() else self.redact(data))
+
+    def handle_entityref(self, name):
+        if not self._skip:
+            self.out.append("x" if self._masking() else f"&{name};")
+
+    def handle_charref(self, name):
+        if not self._skip:
+            self.out.append("x" if self._masking() else f"&#{name};")
+
+    def handle_decl(self, decl):
+        self.out.append(f"<!{decl}>")
+
+    def handle_comment(self, data):
+        pass
+
+
+def sanitize_html(html: str, own_user: str = "") -> str:
+    s = _Sanitizer(own_user)
+    s.prescan(html)
+    s.feed(html)
+    s.close()
+    return "".join(s.out)
+
+
+# Handle da conta logada, lido do link "Perfil"/"Profile" da navegação (IG_PROFILE
+# pode ser um e-mail ou telefone e não serve para reconhecer o próprio @).
+_CAPTURE_JS = """
+var own = '';
+var links = Array.prototype.slice
+  .call(document.querySelectorAll('nav a[href], [role="navigation"] a[href]'))
+  .concat(Array.prototype.slice.call(document.querySelectorAll('a[href]')));
+for (var i = 0; i < links.length; i++) {
+  var a = links[i], h = a.getAttribute('href') || '';
+  if (/^\\/[A-Za-z0-9._]{1,30}\\/$/.test(h) && /\\b(perfil|profile)\\b/i.test(a.textContent || '')) {
+    own = h.slice(1, -1);
+    break;
+  }
+}
+return [document.documentElement.outerHTML, own];
+"""
+
+
+def _enabled() -> bool:
+    v = os.getenv("RECORD_FIXTURES")
+    return v is not None and v.strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def _root() -> Path:
+    return Path(os.getenv("RECORD_FIXTURES_DIR", "bench/fixtures/recorded"))
+
+
+def slug(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+_COUNTS: Dict[str, int] = {}
+_LOCK = threading.Lock()
+
+
+def record_page(driver: WebDriver, kind: str, key: str) -> Optional[Path]:
+    """Grava o DOM atual sanitizado como fixture `kind` (no-op se desligado)."""
+    if not _enabled() or kind not in KINDS:
+        return None
+    try:
+        cap = int(os.getenv("RECORD_MAX_PER_KIND", "20"))
+    except Exception:
+        cap = 20
+    out_dir = _root() / kind
+    with _LOCK:
+        if kind not in _COUNTS:
+            _COUNTS[kind] = len(list(out_dir.glob("*.html"))) if out_dir.is_dir() else 0
+        if _COUNTS[kind] >= cap:
+            return None
+        _COUNTS[kind] += 1
+    try:
+        t0 = time.perf_counter()
+        html, own = driver.execute_script(_CAPTURE_JS) or ("", "")
+        html = html or ""
+        clean = "<!DOCTYPE html>\n" + sanitize_html(html, own or "")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        name = (
+            re.sub(r"[^a-z0-9_-]+", "-", key.lower()).strip("-")[:40]
+            if kind == "keyword"
+            else slug(key)
+        ) or slug(key)
+        path = out_dir / f"{name}.html"
+        path.write_text(clean, encoding="utf-8")
+        with (_root() / "manifest.jsonl").open("a", encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "kind": kind,
+                        "file": f"{kind}/{path.name}",
+                        "raw_bytes": len(html),
+                        "bytes": len(clean),
+                        "ts": round(time.time(), 3),
+                    }
+                )
+                + "\n"
+            )
+        logger.info(
+            f"🎞️ fixture {kind} gravada: {path} ({len(clean) / 1024:.0f}KB, "
+            f"{time.perf_counter() - t0:.2f}s)"
+        )
+        return path
+    except Exception as e:
+        logger.warning(f"Falha ao gravar fixture {kind}: {e}")
+        with _LOCK:
+            _COUNTS[kind] -= 1
+        return None
@@ -0,0 +1,343 @@
+# utils/report.py
+from __future__ import annotations
+
+import csv
+import glob
+import gzip
+import json
+import os
+import random
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Relatório offline de execuções a partir dos logs (inclusive segmentos .gz),
+# numa única passada em streaming: memória constante mesmo com centenas de MB.
+
+_RESERVOIR = 1024  # amostras mantidas por série de latência
+
+_RE_LINE = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\w+)\s*\| ([^|]+?) \| [^|]*? \| (.*)$"
+)
+_RE_RUN_START = re.compile(r"Iniciando orquestração")
+_RE_HUMAN_SLEEP = re.compile(r"⏳ .*?aguardando ([\d.]+)s")
+_RE_MICRO_SLEEP = re.compile(r"⏱️ aguardando ([\d.]+)s")
+_RE_BLOCK_WAIT = re.compile(r"cooldown por bloqueio \((\d+)s restantes\)")
+_RE_NAV = re.compile(r"🧭 navegação \(([^)]*)\) em ([\d.]+)s")
+_RE_TIMEIT = re.compile(r"⏱️ (.+) concluído em ([\d.]+)s")
+_RE_RESULT = re.compile(r"resultado (\w+): (OK|FALHA)(?: — origem=(\S+))?")
+_RE_COLLECT_OPEN = re.compile(r"coleta\(\w+\) (?:iniciada|em streaming)")
+_RE_TAG = re.compile(r"🏷️ tag '(.+)': \+(\d+) links em (\d+) scrolls")
+
+_ACTIONS = ("like", "comment")
+
+
+class Reservoir:
+    """Amostragem de reservatório (Algoritmo R): quantis com memória fixa."""
+
+    def __init__(self, k: int = _RESERVOIR, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, v: float) -> None:
+        self.n += 1
+        self.total += v
+        if len(self.samples) < self.k:
+            self.samples.append(v)
+        else:
+            j = self._rng.randrange(self.n)
+            if j < self.k:
+                self.samples[j] = v
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        vals = sorted(self.samples)
+        return vals[min(len(vals) - 1, int(round(q * (len(vals) - 1))))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.n,
+            "mean": round(self.total / self.n, 3) if self.n else 0.0,
+            "p50": round(self.quantile(0.5), 3),
+            "p90": round(self.quantile(0.9), 3),
+            "p95": round(self.quantile(0.95), 3),
+            "p99": round(self.quantile(0.99), 3),
+        }
+
+
+class RunStats:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+        self.secs = {
+            "sleep": 0.0,
+            "cooldown": 0.0,
+            "navigation": 0.0,
+            "dom": 0.0,
+            "collect": 0.0,
+        }
+        self._action_secs = 0.0
+        self._action_nav = 0.0
+        self._action_micro = 0.0
+        self._in_action = False
+        self._in_collect = False
+        self._collect_sleep = 0.0  # pausas logadas dentro da coleta aberta
+        self.actions: Dict[str, Dict[str, int]] = {}
+        self.tags: Dict[str, Dict[str, int]] = {}
+        self.latency: Dict[str, Reservoir] = {}
+
+    def _lat(self, key: str, v: float) -> None:
+        r = self.latency.get(key)
+        if r is None:
+            r = self.latency[key] = Reservoir()
+        r.add(v)
+
+    def _tag(self, tag: str) -> Dict[str, int]:
+        return self.tags.setdefault(tag, {"links": 0, "scrolls": 0, "ok": 0, "fail": 0})
+
+    def feed(self, ts: datetime, name: str, msg: str) -> None:
+        if self.first is None:
+            self.first = ts
+        self.last = ts
+
+        m = _RE_MICRO_SLEEP.search(msg)
+        if m:
+            v = float(m.group(1))
+            self.secs["sleep"] += v
+            if name == "action":
+                self._action_micro += v
+            elif self._in_collect:
+                self._collect_sleep += v
+            return
+        m = _RE_HUMAN_SLEEP.search(msg)
+        if m:
+            key = "cooldown" if "cooldown" in msg else "sleep"
+            v = float(m.group(1))
+            self.secs[key] += v
+            if self._in_collect:
+                self._collect_sleep += v
+            return
+        if _RE_COLLECT_OPEN.search(msg):
+            self._in_collect = True
+            self._collect_sleep = 0.0
+            return
+        m = _RE_BLOCK_WAIT.search(msg)
+        if m:
+            self.secs["cooldown"] += float(m.group(1))
+            return
+        m = _RE_NAV.search(msg)
+        if m:
+            v = float(m.group(2))
+            self.secs["navigation"] += v
+            self._action_nav += v
+            self._lat("navigation", v)
+            return
+        m = _RE_TIMEIT.search(msg)
+        if m:
+            label, v = m.group(1), float(m.group(2))
+            phase = label.split(" ", 1)[-1]
+            self._lat(f"phase:{phase}", v)
+            if phase in _ACTIONS:
+                # tempo de DOM = ação − navegação − micro-pausas dentro dela
+                dom = v - self._action_nav - self._action_micro
+                self.secs["dom"] += max(0.0, dom)
+            elif "coleta" in phase or "recolha" in phase:
+                # as pausas de scroll já entraram em "sleep": não contar duas vezes
+                self.secs["collect"] += max(0.0, v - self._collect_sleep)
+                self._in_collect = False
+                self._collect_sleep = 0.0
+            self._action_nav = self._action_micro = 0.0
+            return
+        m = _RE_RESULT.search(msg)
+        if m:
+            action, status, origin = m.group(1), m.group(2), m.group(3)
+            a = self.actions.setdefault(action, {"ok": 0, "fail": 0})
+            a["ok" if status == "OK" else "fail"] += 1
+            if origin and origin.startswith("kw:"):
+                t = self._tag(origin[3:])
+                t["ok" if status == "OK" else "fail"] += 1
+            return
+        m = _RE_TAG.search(msg)
+        if m:
+            t = self._tag(m.group(1))
+            t["links"] += int(m.group(2))
+            t["scrolls"] += int(m.group(3))
+
+    # ---------- saída ----------
+    def wall_secs(self) -> float:
+        if self.first is None or self.last is None:
+            return 0.0
+        return (self.last - self.first).total_seconds()
+
+    def to_dict(self) -> Dict:
+        wall = self.wall_secs()
+        split = {k: round(v, 1) for k, v in self.secs.items()}
+        accounted = sum(self.secs.values())
+        split["other"] = round(max(0.0, wall - accounted), 1)
+        actions = {
+            k: {**v, "rate": round(v["ok"] / max(1, v["ok"] + v["fail"]), 3)}
+            for k, v in self.actions.items()
+        }
+        tags = {
+            k: {
+                **v,
+                "links_per_scroll": round(v["links"] / max(1, v["scrolls"]), 2),
+                "rate": round(v["ok"] / max(1, v["ok"] + v["fail"]), 3),
+            }
+            for k, v in self.tags.items()
+        }
+        return {
+            "run": self.run_id,
+            "start": self.first.isoformat() if self.first else None,
+            "end": self.last.isoformat() if self.last else None,
+            "wall_secs": round(wall, 1),
+            "time_split_secs": split,
+            # > 0 = categorias sobrepostas (o split deveria caber no tempo de parede)
+            "split_excess_secs": round(max(0.0, accounted - wall), 1),
+            "actions": actions,
+            "tags": tags,
+            "latency": {k: r.summary() for k, r in sorted(self.latency.items())},
+        }
+
+
+# ---------- leitura ----------
+def _segment_key(suffix: str) -> Tuple[str, int]:
+    """
+    Ordem cronológica do sufixo do segmento: '<YYYYmmdd-HHMMSS>[-n][.gz]'
+    (sink compartilhado) ou '<n>[.gz]' (numeração clássica, maior = mais antigo).
+    Comparar como string colocaria 'app.log.10' antes de 'app.log.2'.
+    """
+    suffix = suffix[:-3] if suffix.endswith(".gz") else suffix
+    m = re.match(r"^(\d{8}-\d{6})(?:-(\d+))?$", suffix)
+    if m:
+        return (m.group(1), int(m.group(2) or 0))
+    if suffix.isdigit():
+        return ("", -int(suffix))
+    return (suffix, 0)
+
+
+def default_log_files(log_file: Optional[str] = None) -> List[str]:
+    """Segmentos rotacionados (mais antigo primeiro) + arquivo corrente."""
+    base = log_file or os.getenv("LOG_FILE", "logs/app.log")
+    segs = [p for p in glob.glob(base + ".*") if not p.endswith(".tmp")]
+    segs.sort(
+        key=lambda p: _segment_key(
+            os.path.basename(p)[len(os.path.basename(base)) + 1 :]
+        )
+    )
+    if os.path.exists(base):
+        segs.append(base)
+    return segs
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_records(paths: Iterable[str]) -> Iterator[Tuple[datetime, str, str]]:
+    for path in paths:
+        with _open(path) as f:
+            for line in f:
+                m = _RE_LINE.match(line.rstrip("\n"))
+                if not m:
+                    continue
+                try:
+                    ts = datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S")
+                except ValueError:
+                    continue
+                yield ts, m.group(3).strip(), m.group(4)
+
+
+def build_report(paths: Iterable[str]) -> List[Dict]:
+    runs: List[Dict] = []
+    cur: Optional[RunStats] = None
+    for ts, name, msg in iter_records(paths):
+        if _RE_RUN_START.search(msg) or cur is None:
+            if cur is not None:
+                runs.append(cur.to_dict())
+            cur = RunStats(ts.strftime("%Y%m%d-%H%M%S"))
+        cur.feed(ts, name, msg)
+    if cur is not None:
+        runs.append(cur.to_dict())
+    return runs
+
+
+def format_text(runs: List[Dict]) -> str:
+    out: List[str] = []
+    for r in runs:
+        wall = r["wall_secs"] or 1.0
+        out.append(
+            f"=== execução {r['run']} ({r['start']} → {r['end']}, {wall / 3600:.2f}h)"
+        )
+        out.append("tempo:")
+        for k, v in r["time_split_secs"].items():
+            out.append(f"  {k:<11} {v:>10.1f}s  {100.0 * v / wall:5.1f}%")
+        if r.get("split_excess_secs", 0) > 1.0:
+            out.append(
+                f"  ⚠️ divisão excede o tempo de parede em {r['split_excess_secs']:.1f}s"
+            )
+        if r["actions"]:
+            out.append("ações:")
+            for k, v in sorted(r["actions"].items()):
+                out.append(
+                    f"  {k:<11} ok={v['ok']} falha={v['fail']} taxa={v['rate']:.0%}"
+                )
+        if r["tags"]:
+            out.append("tags:")
+            ranked = sorted(
+                r["tags"].items(),
+                key=lambda kv: kv[1]["links_per_scroll"],
+                reverse=True,
+            )
+            for k, v in ranked:
+                out.append(
+                    f"  {k:<20} links={v['links']} ({v['links_per_scroll']}/scroll) "
+                    f"ok={v['ok']} falha={v['fail']}"
+                )
+        if r["latency"]:
+            out.append("latência (s):")
+            for k, v in r["latency"].items():
+                out.append(
+                    f"  {k:<28} n={v['count']} p50={v['p50']} p95={v['p95']} p99={v['p99']}"
+                )
+        out.append("")
+    return "\n".join(out)
+
+
+def write_csv(runs: List[Dict], path: str) -> None:
+    """Formato longo: run, seção, chave, métrica, valor."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["run", "section", "key", "metric", "value"])
+        for r in runs:
+            w.writerow([r["run"], "run", "", "wall_secs", r["wall_secs"]])
+            for k, v in r["time_split_secs"].items():
+                w.writerow([r["run"], "time", k, "secs", v])
+            for section in ("actions", "tags", "latency"):
+                for key, vals in r[section].items():
+                    for metric, v in vals.items():
+                        w.writerow([r["run"], section, key, metric, v])
+
+
+def run_report(
+    paths: List[str], *, csv_path: Optional[str] = None, json_path: Optional[str] = None
+) -> int:
+    paths = paths or default_log_files()
+    if not paths:
+        print("Nenhum arquivo de log encontrado (LOG_TO_FILE/LOG_FILE).")
+        return 2
+    runs = build_report(paths)
+    print(format_text(runs))
+    if csv_path:
+        write_csv(runs, csv_path)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(runs, f, ensure_ascii=False, indent=2)
+    return 0
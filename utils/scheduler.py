@@ -0,0 +1,184 @@
+# utils/scheduler.py
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import random
+import time
+import datetime as _dt
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger, interruptible_sleep
+
+logger = get_logger("orchestrator")
+
+
+def _hhmmss(ts: float) -> str:
+    return _dt.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+
+
+class ActionScheduler:
+    """
+    Planeja de antemão os horários das ações para toda a janela (timebox),
+    respeitando `max_actions`, o soft-cap horário (no máximo `hourly_cap` slots
+    em qualquer janela de `window_secs`) e a distribuição de pausas.
+
+    O despacho sai de uma fila de timers (heap). Falhas ganham um slot de
+    reposição no fim do plano; atrasos (cooldown, ação lenta) empurram todos os
+    slots pendentes para frente em vez de disparar ações em rajada.
+    """
+
+    def __init__(
+        self,
+        *,
+        start_ts: float,
+        deadline_ts: float,
+        max_actions: int,
+        hourly_cap: int,
+        pause_range: Tuple[float, float],
+        window_secs: float = 3600.0,
+    ):
+        self.start_ts = float(start_ts)
+        self.deadline_ts = float(deadline_ts)
+        self.max_actions = int(max_actions)
+        self.hourly_cap = max(1, int(hourly_cap))
+        a, b = float(pause_range[0]), float(pause_range[1])
+        self.pause_range = (min(a, b), max(a, b))
+        self.window_secs = float(window_secs)
+        # Estica as pausas para que o ritmo médio já caiba no soft-cap: o plano
+        # fica espalhado pela hora em vez de encostar no teto e parar.
+        mean_pause = sum(self.pause_range) / 2.0 or 1.0
+        self._stretch = max(1.0, (self.window_secs / self.hourly_cap) / mean_pause)
+
+        self._heap: List[Tuple[float, int]] = []
+        self._planned: List[float] = []  # horários planejados, em ordem
+        self.timeline: List[Dict] = []
+        self._plan()
+
+    # ---------- planejamento ----------
+    def _next_time(self, after: float) -> float:
+        t = after + random.uniform(*self.pause_range) * self._stretch
+        n = len(self._planned)
+        if n >= self.hourly_cap:
+            t = max(t, self._planned[n - self.hourly_cap] + self.window_secs)
+        return t
+
+    def _append_slot(self, after: float) -> Optional[int]:
+        t = self._next_time(after)
+        if t > self.deadline_ts:
+            return None
+        slot = len(self.timeline)
+        self._planned.append(t)
+        self.timeline.append(
+            {"slot": slot, "planned": t, "actual": None, "ok": None, "note": ""}
+        )
+        heapq.heappush(self._heap, (t, slot))
+        return slot
+
+    def _plan(self) -> None:
+        last = self.start_ts
+        while len(self._planned) < self.max_actions:
+            if self._append_slot(last) is None:
+                break
+            last = self._planned[-1]
+        if self._planned:
+            logger.info(
+                f"🗓️ plano de ações: {len(self._planned)} slots entre "
+                f"{_hhmmss(self._planned[0])} e {_hhmmss(self._planned[-1])}"
+            )
+        else:
+            logger.info("🗓️ plano de ações vazio (timebox curto demais?)")
+
+    # ---------- despacho ----------
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def shift(self, seconds: float, note: str = "") -> None:
+        """Empurra todos os slots pendentes; descarta os que passam do deadline."""
+        if seconds <= 0 or not self._heap:
+            return
+        shifted: List[Tuple[float, int]] = []
+        dropped = 0
+        for t, slot in self._heap:
+            nt = t + seconds
+            if nt > self.deadline_ts:
+                self.timeline[slot]["note"] = "descartado (deadline)"
+                dropped += 1
+                continue
+            self.timeline[slot]["planned"] = nt
+            self._planned[slot] = nt
+            shifted.append((nt, slot))
+        heapq.heapify(shifted)
+        self._heap = shifted
+        logger.info(
+            f"🗓️ plano reagendado +{seconds:.0f}s ({note or 'atraso'}); "
+            f"{len(shifted)} slots pendentes, {dropped} descartados"
+        )
+
+    def wait_next(self) -> Optional[int]:
+        """
+        Aguarda (interrompível) o próximo slot e o retorna. Se o slot já passou
+        por mais de meia pausa mínima, reagenda o restante do plano pelo atraso.
+        Retorna None se o plano acabou ou se a parada foi pedida.
+        """
+        if not self._heap:
+            return None
+        now = time.time()
+        t, slot = self._heap[0]
+        late = now - t
+        if late > self.pause_range[0] / 2.0:
+            self.shift(late, "atraso/cooldown")
+            if not self._heap:
+                return None
+            t, slot = self._heap[0]
+        heapq.heappop(self._heap)
+        wait = max(0.0, t - time.time())
+        logger.info(
+            f"⏳ slot {slot} planejado para {_hhmmss(t)} — aguardando {wait:0.2f}s "
+            f"({len(self._heap)} restantes)"
+        )
+        if not interruptible_sleep(wait):
+            return None
+        return slot
+
+    def record(self, slot: int, ok: bool, note: str = "") -> None:
+        entry = self.timeline[slot]
+        entry["actual"] = time.time()
+        entry["ok"] = bool(ok)
+        if note:
+            entry["note"] = note
+        if not ok:
+            # reposição: um novo slot ao fim do plano (se couber na janela)
+            last = max(self._planned) if self._planned else entry["actual"]
+            new = self._append_slot(max(last, entry["actual"]))
+            if new is not None:
+                logger.info(f"🗓️ slot {slot} falhou — reposição no slot {new}")
+
+    # ---------- exposição ----------
+    def stats(self) -> Dict:
+        done = [e for e in self.timeline if e["actual"] is not None]
+        drifts = [e["actual"] - e["planned"] for e in done]
+        return {
+            "planned": len(self.timeline),
+            "executed": len(done),
+            "ok": sum(1 for e in done if e["ok"]),
+            "pending": self.pending(),
+            "next_due": self.next_due(),
+            "avg_drift_secs": (sum(drifts) / len(drifts)) if drifts else 0.0,
+        }
+
+    def export(self, path: Path) -> None:
+        """Salva o timeline planejado x real em JSON (escrita atômica)."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = {"stats": self.stats(), "timeline": self.timeline}
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Falha ao exportar timeline do plano: {e}")
@@ -0,0 +1,152 @@
+# utils/supervisor.py
+from __future__ import annotations
+
+import random
+from typing import Any, Callable, Dict, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils.auth import ensure_login
+from utils.driver import init_driver, close_driver, set_main_handle
+from utils.logger import get_logger, interruptible_sleep, stop_requested
+
+logger = get_logger("orchestrator")
+
+# Fragmentos de erro que indicam sessão/processo morto (Chrome ou chromedriver)
+_DEAD_SESSION_HINTS = (
+    "invalid session id",
+    "session deleted",
+    "no such window",
+    "chrome not reachable",
+    "disconnected",
+    "target window already closed",
+    "connection refused",
+    "max retries exceeded",
+    "remote end closed connection",
+    "failed to establish a new connection",
+    "connection aborted",
+    "broken pipe",
+)
+
+
+def is_dead_session_error(exc: BaseException) -> bool:
+    """True se a exceção indica que o browser/driver morreu (não um erro de página)."""
+    msg = f"{type(exc).__name__}: {exc}".lower()
+    if "invalidsessionid" in msg or "nosuchwindow" in msg:
+        return True
+    return any(h in msg for h in _DEAD_SESSION_HINTS)
+
+
+class DriverSupervisor:
+    """
+    Mantém um driver vivo para o perfil: detecta sessão morta e reinicia o
+    browser no mesmo diretório de perfil (sessions/<perfil>) com backoff,
+    refazendo ensure_login. O estado do worker (fila, contadores) fica com o
+    chamador, que só precisa reler `supervisor.driver` após `recover()`.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        driver_kwargs: Dict[str, Any],
+        username: str,
+        password: str,
+        session_dir: str,
+        on_ready: Optional[Callable[[Optional[WebDriver]], None]] = None,
+        max_restarts: int = 5,
+        backoff_base: float = 5.0,
+        backoff_max: float = 120.0,
+    ):
+        self.name = name
+        self.driver_kwargs = dict(driver_kwargs)
+        self.username = username
+        self.password = password
+        self.session_dir = session_dir
+        self.on_ready = on_ready
+        self.max_restarts = int(max_restarts)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.driver: Optional[WebDriver] = None
+        self.restarts = 0
+
+    # ---------- ciclo de vida ----------
+    def _launch(self) -> WebDriver:
+        driver = init_driver(**self.driver_kwargs)
+        self.driver = driver
+        try:
+            set_main_handle(driver, driver.current_window_handle)
+        except Exception:
+            pass
+        if self.on_ready:
+            self.on_ready(driver)
+        return driver
+
+    def start(self) -> WebDriver:
+        """Primeiro start (exceções propagam para o chamador tratar)."""
+        return self._launch()
+
+    def close(self) -> None:
+        drv, self.driver = self.driver, None
+        if self.on_ready:
+            self.on_ready(None)
+        try:
+            close_driver(drv)
+        except Exception:
+            pass
+
+    # ---------- saúde ----------
+    def is_alive(self) -> bool:
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            if is_dead_session_error(e):
+                logger.warning(f"[{self.name}] sessão do driver morta: {e}")
+                return False
+            # erro de página/JS não significa browser morto
+            return True
+
+    def recover(self, *, force: bool = False) -> bool:
+        """
+        Garante um driver vivo. Se o atual morreu (ou `force`, ex.: reciclagem
+        por memória), reinicia com backoff exponencial (interrompível) e refaz
+        o login. False se desistiu.
+        """
+        if not force and self.is_alive():
+            return True
+        attempt = 0
+        while not stop_requested() and self.restarts < self.max_restarts:
+            planned = force and attempt == 0
+            delay = min(self.backoff_max, self.backoff_base * (2**attempt))
+            if planned:
+                delay = 0.0  # restart planejado: sem backoff, fora da cota de falhas
+            delay *= random.uniform(0.8, 1.2)
+            attempt += 1
+            if not planned:
+                self.restarts += 1
+            logger.warning(
+                f"[{self.name}] reiniciando browser em {delay:.1f}s "
+                f"(restart {self.restarts}/{self.max_restarts})"
+            )
+            self.close()
+            if not interruptible_sleep(delay):
+                return False
+            try:
+                driver = self._launch()
+                if not ensure_login(
+                    driver=driver,
+                    username=self.username,
+                    password=self.password,
+                    session_dir=self.session_dir,
+                ):
+                    logger.warning(f"[{self.name}] ensure_login falhou após restart.")
+                    continue
+                logger.info(f"[{self.name}] browser reiniciado e sessão restaurada.")
+                return True
+            except Exception as e:
+                logger.warning(f"[{self.name}] falha ao reiniciar browser: {e}")
+        logger.error(f"[{self.name}] recuperação do driver esgotada/interrompida.")
+        return False
@@ -0,0 +1,140 @@
+# utils/tag_scheduler.py
+from __future__ import annotations
+
+import json
+import math
+import os
+import datetime as _dt
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger("collector")
+
+# Rendimento assumido (links novos por scroll) para tags sem histórico:
+# otimista de propósito, para que toda tag nova seja explorada ao menos uma vez.
+_PRIOR_YIELD = 4.0
+# Peso mínimo — tags "secas" continuam com uma fatia pequena do orçamento
+_FLOOR_YIELD = 0.25
+# Suavização exponencial do rendimento (peso da observação mais recente)
+_ALPHA = 0.4
+# Uma tag sem fatia no orçamento é re-sondada após N coletas puladas
+_PROBE_EVERY = 4
+
+
+class TagScheduler:
+    """
+    Distribui o orçamento de scrolls entre as tags pelo rendimento recente
+    (links novos por scroll, média exponencial), persistido por perfil em
+    <profile_dir>/tag_stats.json.
+    """
+
+    def __init__(self, tags: List[str], profile_dir: Optional[str] = None):
+        self.tags = list(dict.fromkeys(tags))
+        base = Path(profile_dir) if profile_dir else Path("sessions/default")
+        base.mkdir(parents=True, exist_ok=True)
+        self.path = base / "tag_stats.json"
+        self.stats: Dict[str, Dict] = self._load()
+
+    # ---------- persistência ----------
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def save(self) -> None:
+        try:
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(
+                json.dumps(self.stats, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar tag_stats: {e}")
+
+    # ---------- rendimento ----------
+    def _yield(self, tag: str) -> float:
+        st = self.stats.get(tag)
+        if not st or not st.get("samples"):
+            return _PRIOR_YIELD
+        return float(st.get("yield", 0.0))
+
+    def weights(self) -> Dict[str, float]:
+        return {t: max(self._yield(t), _FLOOR_YIELD) for t in self.tags}
+
+    def record(self, tag: str, scrolls: int, new_links: int) -> None:
+        """Registra uma visita: `scrolls` inclui a abertura da página (mín. 1)."""
+        st = self.stats.setdefault(tag, {"yield": 0.0, "samples": 0})
+        observed = float(new_links) / max(1, int(scrolls))
+        if st.get("samples"):
+            st["yield"] = _ALPHA * observed + (1.0 - _ALPHA) * float(st["yield"])
+        else:
+            st["yield"] = observed
+        st["samples"] = int(st.get("samples", 0)) + 1
+        st["scrolls"] = int(st.get("scrolls", 0)) + int(scrolls)
+        st["links"] = int(st.get("links", 0)) + int(new_links)
+        st["skipped"] = 0
+        st["updated"] = _dt.datetime.now().isoformat(timespec="seconds")
+
+    def _mark_skipped(self, tag: str) -> None:
+        st = self.stats.setdefault(tag, {"yield": 0.0, "samples": 0})
+        st["skipped"] = int(st.get("skipped", 0)) + 1
+
+    # ---------- planejamento ----------
+    def plan(
+        self, max_links: int, *, min_budget: int = 3, max_per_tag: int = 12
+    ) -> List[Tuple[str, int]]:
+        """
+        Retorna [(tag, scrolls)] em ordem de produtividade. O orçamento total
+        sai do rendimento médio ponderado (no mínimo `min_budget` scrolls no
+        total, não por tag); cada tag recebe uma fatia
+        proporcional ao peso (limitada a `max_per_tag`). Tags que ficariam sem
+        scroll só são visitadas quando a sondagem periódica vence.
+        """
+        if not self.tags:
+            return []
+        w = self.weights()
+        total_w = sum(w.values()) or 1.0
+        avg_yield = sum(w[t] * w[t] for t in self.tags) / total_w
+        budget = math.ceil(max_links / max(avg_yield, _FLOOR_YIELD))
+        budget = max(min_budget, min(budget, max_per_tag * len(self.tags)))
+
+        alloc: Dict[str, int] = {t: 0 for t in self.tags}
+        remaining = budget
+        open_tags = list(self.tags)
+        # distribui por maiores restos, redistribuindo o excedente de quem bate o teto
+        while remaining > 0 and open_tags:
+            tw = sum(w[t] for t in open_tags) or 1.0
+            shares = {t: remaining * w[t] / tw for t in open_tags}
+            given = 0
+            for t in open_tags:
+                n = min(int(shares[t]), max_per_tag - alloc[t])
+                alloc[t] += n
+                given += n
+            left = remaining - given
+            for t in sorted(open_tags, key=lambda x: shares[x] % 1, reverse=True):
+                if left <= 0:
+                    break
+                if alloc[t] < max_per_tag:
+                    alloc[t] += 1
+                    left -= 1
+            progressed = remaining - left
+            remaining = left
+            open_tags = [t for t in open_tags if alloc[t] < max_per_tag]
+            if progressed <= 0:
+                break
+
+        plan: List[Tuple[str, int]] = []
+        for t in sorted(self.tags, key=lambda x: w[x], reverse=True):
+            n = alloc[t]
+            if n <= 0:
+                skipped = int(self.stats.get(t, {}).get("skipped", 0))
+                if skipped + 1 < _PROBE_EVERY:
+                    self._mark_skipped(t)
+                    continue
+                n = 1  # sondagem
+            plan.append((t, n))
+        return plan
@@ -0,0 +1,107 @@
+# utils/watchdog.py
+from __future__ import annotations
+
+import time
+from typing import Dict, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from utils import metrics
+from utils.driver import browser_rss_bytes
+from utils.logger import get_logger
+
+logger = get_logger("orchestrator")
+
+_MB = 1024 * 1024
+
+
+class MemoryWatchdog:
+    """
+    Amostra a memória do Chrome periodicamente (CDP Performance.getMetrics +
+    RSS dos processos) e, ao cruzar os limites, pede reciclagem:
+    'tab' (aba nova, renderer antigo descartado) ou 'browser' (restart).
+
+    A decisão é só retornada — quem recicla é o orquestrador, num ponto seguro
+    entre ações. Se o limite continuar estourado logo após reciclar a aba,
+    escala para 'browser'.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str = "default",
+        interval_secs: float = 300.0,
+        heap_mb: float = 512.0,
+        rss_mb: float = 2048.0,
+        nodes: int = 150_000,
+    ):
+        self.name = name
+        self.interval_secs = float(interval_secs)
+        self.heap_mb = float(heap_mb)
+        self.rss_mb = float(rss_mb)
+        self.nodes = int(nodes)
+        self._last_ts = 0.0
+        self._last_action: Optional[str] = None
+        self._cdp_enabled_for: Optional[str] = None
+        self.recycles = {"tab": 0, "browser": 0}
+
+    def _cdp_metrics(self, driver: WebDriver) -> Dict[str, float]:
+        try:
+            sid = str(getattr(driver, "session_id", ""))
+            if self._cdp_enabled_for != sid:
+                driver.execute_cdp_cmd("Performance.enable", {})
+                self._cdp_enabled_for = sid
+            raw = driver.execute_cdp_cmd("Performance.getMetrics", {}) or {}
+            return {m["name"]: float(m["value"]) for m in raw.get("metrics", [])}
+        except Exception:
+            self._cdp_enabled_for = None
+            return {}
+
+    def sample(self, driver: WebDriver) -> Dict[str, float]:
+        m = self._cdp_metrics(driver)
+        rss = browser_rss_bytes(driver)
+        sample = {
+            "js_heap_used_mb": m.get("JSHeapUsedSize", 0.0) / _MB,
+            "js_heap_total_mb": m.get("JSHeapTotalSize", 0.0) / _MB,
+            "dom_nodes": m.get("Nodes", 0.0),
+            "documents": m.get("Documents", 0.0),
+            "js_listeners": m.get("JSEventListeners", 0.0),
+            "rss_mb": (rss / _MB) if rss is not None else 0.0,
+        }
+        for k, v in sample.items():
+            metrics.set_gauge(f"browser_{k}", v, profile=self.name)
+        metrics.inc("browser_memory_samples_total", profile=self.name)
+        logger.info(
+            f"[{self.name}] 🩺 memória: heap={sample['js_heap_used_mb']:.0f}MB "
+            f"nós={sample['dom_nodes']:.0f} docs={sample['documents']:.0f} "
+            f"rss={sample['rss_mb']:.0f}MB"
+        )
+        return sample
+
+    def check(self, driver: WebDriver, *, force: bool = False) -> Optional[str]:
+        """Amostra se o intervalo venceu; retorna 'tab', 'browser' ou None."""
+        now = time.time()
+        if not force and now - self._last_ts < self.interval_secs:
+            return None
+        self._last_ts = now
+        s = self.sample(driver)
+
+        reasons = []
+        if s["js_heap_used_mb"] > self.heap_mb:
+            reasons.append(f"heap {s['js_heap_used_mb']:.0f}>{self.heap_mb:.0f}MB")
+        if s["dom_nodes"] > self.nodes:
+            reasons.append(f"nós {s['dom_nodes']:.0f}>{self.nodes}")
+        if s["rss_mb"] > self.rss_mb:
+            reasons.append(f"rss {s['rss_mb']:.0f}>{self.rss_mb:.0f}MB")
+        if not reasons:
+            self._last_action = None
+            return None
+
+        action = "browser" if self._last_action == "tab" else "tab"
+        self._last_action = action
+        self.recycles[action] += 1
+        metrics.inc("browser_recycles_total", profile=self.name, kind=action)
+        logger.warning(
+            f"[{self.name}] 🩺 limite cruzado ({', '.join(reasons)}) → reciclar {action}"
+        )
+        return action